@@ -0,0 +1,147 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Deterministic generator of synthetic WAW dialogs for benchmarks.
+# The same parameters (and seed) always produce the same dialog files.
+
+import os
+import random
+
+from xml.sax.saxutils import escape
+
+
+AUTOGENERATE_TYPES = ['abort', 'again', 'back', 'repeat', 'generic']
+
+class DialogGenerator(object):
+    """Generates dialog with numberOfNodes nodes (autogenerated nodes, slots and handlers are not counted)
+
+    Nodes are organized breadth first - top level nodes get fanOut children each, their children get fanOut
+    children each etc. up to the given depth (number of top level nodes is computed so that the tree is full).
+    Top level nodes are divided into the main file and numberOfImports imported files.
+
+    Args:
+        numberOfNodes (int): number of dialog nodes
+        depth (int): depth of the dialog tree (1 - flat dialog)
+        fanOut (int): number of children of every node which is not a leaf
+        numberOfImports (int): number of imported dialog files
+        slotDensity (float): probability that node has slots
+        handlerDensity (float): probability that node (or slot) has handlers
+        autogenerate (list): types of autogenerated nodes switched on for the whole dialog (see AUTOGENERATE_TYPES)
+        seed (int): seed of the random generator
+    """
+
+    def __init__(self, numberOfNodes, depth=3, fanOut=4, numberOfImports=4, slotDensity=0.05, handlerDensity=0.05, autogenerate=(), seed=0):
+        self.numberOfNodes = numberOfNodes
+        self.depth = max(1, depth)
+        self.fanOut = max(1, fanOut)
+        self.numberOfImports = numberOfImports
+        self.slotDensity = slotDensity
+        self.handlerDensity = handlerDensity
+        self.autogenerate = autogenerate
+        self.random = random.Random(seed)
+
+    def getTree(self):
+        """Returns list of top level nodes, every node is a list of its children"""
+        nodesInFullTree = sum(self.fanOut ** level for level in range(self.depth))
+        topLevelNodes = [[] for _ in range(max(1, -(-self.numberOfNodes // nodesInFullTree)))]
+        numberOfNodes = len(topLevelNodes)
+        level = topLevelNodes
+        for _ in range(1, self.depth):
+            nextLevel = []
+            for node in level:
+                for _ in range(self.fanOut):
+                    if numberOfNodes >= self.numberOfNodes:
+                        break
+                    child = []
+                    node.append(child)
+                    nextLevel.append(child)
+                    numberOfNodes += 1
+            level = nextLevel
+        return topLevelNodes
+
+    def nodeXml(self, node, names, indent):
+        """Returns XML of the node and all its children, names is an iterator of unique node names"""
+        name = next(names)
+        random = self.random
+        xml = indent + '<node name="%s">\n' % name
+        xml += indent + '  <condition>#INTENT_%s</condition>\n' % name
+        if random.random() < 0.3:
+            xml += indent + '  <context><%s_visited type="boolean">true</%s_visited><counter type="number">%d</counter></context>\n' % (name, name, random.randint(0, 9))
+        xml += indent + '  <output><textValues><values>%s</values><values>Other text of %s</values></textValues></output>\n' % (escape('Text of <' + name + '>'), name)
+        if random.random() < self.slotDensity:
+            xml += indent + '  <slots>\n'
+            for slotIndex in range(random.randint(1, 3)):
+                xml += indent + '    <slot variable="$%s_slot%d">\n' % (name, slotIndex)
+                xml += self.handlersXml(indent + '      ', alwaysGenerate=True)
+                xml += indent + '    </slot>\n'
+            xml += indent + '  </slots>\n'
+        xml += self.handlersXml(indent + '  ')
+        if node:
+            xml += indent + '  <nodes>\n'
+            for child in node:
+                xml += self.nodeXml(child, names, indent + '    ')
+            xml += indent + '  </nodes>\n'
+        xml += indent + '</node>\n'
+        return xml
+
+    def handlersXml(self, indent, alwaysGenerate=False):
+        if not alwaysGenerate and self.random.random() >= self.handlerDensity:
+            return ''
+        xml = indent + '<handlers>\n'
+        for eventName in ['focus', 'nomatch']:
+            xml += indent + '  <handler eventName="%s"><output><text>Handler %s</text></output></handler>\n' % (eventName, eventName)
+        return xml + indent + '</handlers>\n'
+
+    def autogenerateXml(self, indent):
+        xml = ''
+        for autogenerateType in self.autogenerate:
+            xml += indent + '<autogenerate type="%s" on="true" propagate="true">' % autogenerateType
+            if autogenerateType == 'repeat':
+                xml += '<attempts>3</attempts><outputs><output><text>Once more.</text></output><output><text>Try it again.</text></output>'
+                xml += '<output><text>Returning to the main menu.</text></output></outputs><goto><target>MAIN_MENU</target></goto>'
+            elif autogenerateType == 'generic':
+                xml += '<node><condition>#HELP</condition><output><text>Help</text></output></node>'
+            xml += '</autogenerate>\n'
+        return xml
+
+    def write(self, dirPath):
+        """Writes main dialog file (main.xml) and imported files to the directory, returns path of the main file"""
+        topLevelNodes = self.getTree()
+        names = ('N%d' % index for index in range(self.numberOfNodes))
+        # top level nodes are divided into main file and imported files
+        numberOfFiles = self.numberOfImports + 1
+        chunkSize = -(-len(topLevelNodes) // numberOfFiles)
+        chunks = [topLevelNodes[index * chunkSize:(index + 1) * chunkSize] for index in range(numberOfFiles)]
+
+        mainXml = '<?xml version="1.0" encoding="UTF-8"?>\n<nodes xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+        mainXml += self.autogenerateXml('  ')
+        mainXml += '  <node name="MAIN_MENU"><condition>#MAIN_MENU</condition><output><text>Main menu</text></output></node>\n'
+        for node in chunks[0]:
+            mainXml += self.nodeXml(node, names, '  ')
+        for importIndex, chunk in enumerate(chunks[1:]):
+            importXml = '<?xml version="1.0" encoding="UTF-8"?>\n<nodes xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+            for node in chunk:
+                importXml += self.nodeXml(node, names, '  ')
+            importXml += '</nodes>\n'
+            with open(os.path.join(dirPath, 'import%d.xml' % importIndex), 'w') as importFile:
+                importFile.write(importXml)
+            mainXml += '  <import>import%d.xml</import>\n' % importIndex
+        mainXml += '  <node name="ANYTHING_ELSE"><condition>anything_else</condition><output><text>I do not understand.</text></output></node>\n'
+        mainXml += '</nodes>\n'
+
+        mainPath = os.path.join(dirPath, 'main.xml')
+        with open(mainPath, 'w') as mainFile:
+            mainFile.write(mainXml)
+        return mainPath
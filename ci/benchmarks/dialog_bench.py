@@ -0,0 +1,127 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Benchmark of dialog conversion scripts (dialog_xml2json, dialog_json2xml, compare_dialogs) on synthetic dialogs.
+# It is not part of the test suite, run it from the root directory:
+#   PYTHONPATH=./scripts python ci/benchmarks/dialog_bench.py [numberOfNodes ...] [options]
+# Every dialog size is measured in a separate process. For each phase, wall time, peak memory
+# of the process (after the phase) and number of generated dialog nodes per second are reported.
+# Phases:
+#   load      - parsing of dialog files (and their validation), merging of imported files
+#   generate  - preprocessing of the tree and generation of autogenerated nodes
+#   emit      - conversion of the tree to JSON and writing of the output file
+#   json2xml  - conversion of the generated JSON back to XML (dialog_json2xml)
+#   compare   - comparison of the generated JSON with itself (compare_dialogs)
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+import compare_dialogs
+import dialog_json2xml
+import dialog_xml2json
+from dialogGenerator import AUTOGENERATE_TYPES, DialogGenerator
+from wawCommons import setLoggerConfig
+
+
+PHASES = ['load', 'generate', 'emit', 'json2xml', 'compare']
+
+def getPeakMemory():
+    """Returns peak resident memory of this process in MB (None if it can not be measured)"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss / (1024.0 * 1024.0) if sys.platform == 'darwin' else maxrss / 1024.0
+
+def runPhase(results, phase, function):
+    """Runs the function, stores its wall time and peak memory of the process to results, returns result of the function"""
+    start = timeit.default_timer()
+    result = function()
+    results[phase] = (timeit.default_timer() - start, getPeakMemory())
+    return result
+
+def callScript(main, argv):
+    """Calls main function of the script, scripts exit with code 0 when everything is OK"""
+    try:
+        main(argv)
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError('%s failed with exit code %s' % (main.__module__, e.code))
+
+def benchmarkDialog(generatorArgs, schema, phases):
+    """Generates dialog and measures phases of its conversion, returns (number of generated nodes, {phase: (time, memory)})"""
+    setLoggerConfig('WARNING')
+    dirPath = tempfile.mkdtemp()
+    try:
+        mainPath = DialogGenerator(**generatorArgs).write(dirPath)
+        outputPath = os.path.join(dirPath, 'dialog.json')
+        config = argparse.Namespace(common_dialog_main=mainPath, common_schema=schema, common_jobs=None)
+        compiler = dialog_xml2json.DialogCompiler(config)
+        results = {}
+
+        root = runPhase(results, 'load', lambda: compiler.loadDialogTree(mainPath, schema, os.getcwd()))
+        dialogNodes = runPhase(results, 'generate', lambda: compiler.generateDialog(root))
+        runPhase(results, 'emit', lambda: dialog_xml2json.writeDialogFile(dialogNodes, dirPath, 'dialog.json'))
+        if 'json2xml' in phases:
+            runPhase(results, 'json2xml', lambda: callScript(dialog_json2xml.main, [outputPath, '-d', dirPath]))
+        if 'compare' in phases:
+            runPhase(results, 'compare', lambda: callScript(compare_dialogs.main, [outputPath, outputPath]))
+
+        with open(outputPath, 'r') as outputFile:
+            return len(json.load(outputFile)), results
+    finally:
+        shutil.rmtree(dirPath)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measures dialog conversion scripts on synthetic dialogs', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('numberOfNodes', nargs='*', type=int, default=[1000, 5000, 20000], help='number of dialog nodes (one measurement for each)')
+    parser.add_argument('-d', '--depth', type=int, default=3, help='depth of the dialog tree')
+    parser.add_argument('-f', '--fanOut', type=int, default=4, help='number of children of every node which is not a leaf')
+    parser.add_argument('-i', '--imports', type=int, default=4, help='number of imported dialog files')
+    parser.add_argument('-sd', '--slotDensity', type=float, default=0.05, help='probability that node has slots')
+    parser.add_argument('-hd', '--handlerDensity', type=float, default=0.05, help='probability that node has handlers')
+    parser.add_argument('-a', '--autogenerate', nargs='*', choices=AUTOGENERATE_TYPES, default=[], help='types of autogenerated nodes switched on for the whole dialog')
+    parser.add_argument('-s', '--schema', required=False, help='validate dialog files against the schema (e.g. data_spec/dialog_schema.xml)')
+    parser.add_argument('-p', '--phases', nargs='*', choices=PHASES, default=PHASES, help='phases to measure (load, generate and emit are always measured)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the dialog generator')
+    args = parser.parse_args(argv)
+
+    schema = os.path.abspath(args.schema) if args.schema else None
+    print('%10s %10s %10s %12s %12s %14s' % ('nodes', 'generated', 'phase', 'time [s]', 'memory [MB]', 'nodes per s'))
+    for numberOfNodes in args.numberOfNodes:
+        generatorArgs = dict(numberOfNodes=numberOfNodes, depth=args.depth, fanOut=args.fanOut, numberOfImports=args.imports,
+                             slotDensity=args.slotDensity, handlerDensity=args.handlerDensity, autogenerate=args.autogenerate, seed=args.seed)
+        # every dialog is measured in a new process so that peak memory is not influenced by previous measurements
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            numberOfDialogNodes, results = executor.submit(benchmarkDialog, generatorArgs, schema, args.phases).result()
+        for phase in PHASES:
+            if phase in results:
+                phaseTime, memory = results[phase]
+                print('%10d %10d %10s %12.3f %12s %14.0f' % (numberOfNodes, numberOfDialogNodes, phase, phaseTime,
+                      '%.1f' % memory if memory is not None else '-', numberOfDialogNodes / phaseTime if phaseTime else 0))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Benchmark of merging large imported dialog files (dialog_xml2json.importNodes).
+# It is not part of the test suite, run it from the root directory:
+#   PYTHONPATH=./scripts python ci/benchmarks/importNodes_bench.py [numberOfNodes ...]
+# Time per node should stay (roughly) the same for growing number of imported nodes.
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import lxml.etree as LET
+
+import dialog_xml2json
+from wawCommons import setLoggerConfig
+
+
+IMPORT_FILES = 4
+
+def writeDialog(dirPath, numberOfNodes):
+    """Writes main dialog importing IMPORT_FILES files with numberOfNodes nodes altogether"""
+    nodesPerFile = numberOfNodes // IMPORT_FILES
+    mainXml = '<nodes>\n'
+    for fileIndex in range(IMPORT_FILES):
+        importXml = '<nodes>\n'
+        for nodeIndex in range(nodesPerFile):
+            importXml += '  <node name="N_%d_%d"><condition>#INTENT_%d_%d</condition><output><text>text</text></output></node>\n' % (fileIndex, nodeIndex, fileIndex, nodeIndex)
+        importXml += '</nodes>\n'
+        with open(os.path.join(dirPath, 'import%d.xml' % fileIndex), 'w') as importFile:
+            importFile.write(importXml)
+        mainXml += '  <node><condition>#MAIN_%d</condition><output><text>text</text></output></node>\n' % fileIndex
+        mainXml += '  <import>import%d.xml</import>\n' % fileIndex
+    mainXml += '  <node><condition>anything_else</condition><output><text>text</text></output></node>\n'
+    mainXml += '</nodes>\n'
+    mainPath = os.path.join(dirPath, 'main.xml')
+    with open(mainPath, 'w') as mainFile:
+        mainFile.write(mainXml)
+    return mainPath
+
+def benchmarkImportNodes(numberOfNodes, repeat):
+    dirPath = tempfile.mkdtemp()
+    try:
+        mainPath = writeDialog(dirPath, numberOfNodes)
+        config = argparse.Namespace(common_dialog_main=mainPath)
+
+        def mergeImports():
+            root = LET.parse(mainPath).getroot()
+            dialog_xml2json.DialogCompiler(config).importNodes(root)
+
+        # parsing time is measured separately and subtracted
+        parseTime = min(timeit.repeat(lambda: LET.parse(mainPath).getroot(), number=1, repeat=repeat))
+        mergeTime = min(timeit.repeat(mergeImports, number=1, repeat=repeat)) - parseTime
+        return mergeTime
+    finally:
+        shutil.rmtree(dirPath)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measures time of merging of imported dialog nodes')
+    parser.add_argument('numberOfNodes', nargs='*', type=int, default=[1000, 5000, 10000], help='number of imported nodes')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='number of repetitions (the best time is reported)')
+    args = parser.parse_args(argv)
+    setLoggerConfig('WARNING')
+
+    print('%10s %12s %14s' % ('nodes', 'merge [s]', 'per node [us]'))
+    for numberOfNodes in args.numberOfNodes:
+        mergeTime = benchmarkImportNodes(numberOfNodes, args.repeat)
+        print('%10d %12.4f %14.2f' % (numberOfNodes, mergeTime, mergeTime / numberOfNodes * 1e6))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
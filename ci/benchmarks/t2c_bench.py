@@ -0,0 +1,143 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Benchmark of dialog_xls2xml on synthetic T2C workbooks (time and memory).
+# It is not part of the test suite, run it from the root directory:
+#   PYTHONPATH=./scripts python ci/benchmarks/t2c_bench.py [numberOfRows ...] [options]
+# Every corpus size is measured in a separate process. For each phase, wall time and peak memory
+# of the process (after the phase) are reported.
+# Phases:
+#   parse    - loading of workbooks and splitting them to blocks (XLSXHandler.parseXLSXFilesIntoDataBlocks)
+#   convert  - conversion of blocks to DialogData (nodes, intents, entities) and resolving of labels
+#   save     - writing of generated dialogs, intents and entities
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+from openpyxl import Workbook
+
+import dialog_xls2xml
+from XLSXHandler import XLSXHandler
+from XMLHandler import XMLHandler
+from wawCommons import setLoggerConfig
+
+
+PHASES = ['parse', 'convert', 'save']
+
+def getPeakMemory():
+    """Returns peak resident memory of this process in MB (None if it can not be measured)"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss / (1024.0 * 1024.0) if sys.platform == 'darwin' else maxrss / 1024.0
+
+def writeCorpus(dirPath, numberOfRows, numberOfWorkbooks, seed):
+    """Writes T2C workbooks with numberOfRows rows in total (including empty rows between blocks), returns their paths
+
+    Blocks are intents with examples and outputs (most of them), conditions with outputs and entities.
+    Outputs use context variables, buttons and jumps to labels of other blocks.
+    """
+    rand = random.Random(seed)
+    rowsPerWorkbook = -(-numberOfRows // numberOfWorkbooks)
+    filePaths = []
+    blockIndex = 0
+    for workbookIndex in range(numberOfWorkbooks):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('T2C')
+        rows = 0
+        while rows < rowsPerWorkbook:
+            blockType = rand.random()
+            if blockType < 0.1:
+                block = [['@entity%d' % blockIndex]] + [['value%d;synonym%d' % (index, index)] for index in range(rand.randint(2, 6))]
+            elif blockType < 0.3:
+                block = [['$state == %d' % blockIndex, 'State %d' % blockIndex]]
+            else:
+                block = [[':label%d' % blockIndex], ['#INTENT%d' % blockIndex]]
+                for index in range(rand.randint(3, 10)):
+                    block.append(['example %d of intent %d' % (index, blockIndex)])
+                block[2].append('Answer %d%%%%$visited=true;topic=t%d' % (blockIndex, blockIndex % 50))
+                if rand.random() < 0.1:
+                    block[2].append('Yes=yes;No=no')
+                if rand.random() < 0.2 and blockIndex > 0:
+                    block[2] += [None] * (3 - len(block[2])) + ['label%d' % rand.randrange(blockIndex)]
+            for row in block:
+                sheet.append(row)
+            sheet.append([])
+            rows += len(block) + 1
+            blockIndex += 1
+        filePath = os.path.join(dirPath, 'workbook%d.xlsx' % workbookIndex)
+        workbook.save(filePath)
+        filePaths.append(filePath)
+    return filePaths
+
+def runPhase(results, phase, function):
+    """Runs the function, stores its wall time and peak memory of the process to results"""
+    start = timeit.default_timer()
+    function()
+    results[phase] = (timeit.default_timer() - start, getPeakMemory())
+
+def benchmarkCorpus(filePaths, jobs):
+    """Converts the workbooks, returns (number of nodes, {phase: (time, memory)})"""
+    setLoggerConfig('WARNING')
+    outputPath = tempfile.mkdtemp()
+    try:
+        config = argparse.Namespace(common_generated_dialogs=os.path.join(outputPath, 'dialogs'),
+                                    common_generated_intents=os.path.join(outputPath, 'intents'),
+                                    common_generated_entities=os.path.join(outputPath, 'entities'))
+        handler = XLSXHandler(config)
+        results = {}
+        runPhase(results, 'parse', lambda: handler.parseXLSXFilesIntoDataBlocks(filePaths, jobs))
+        runPhase(results, 'convert', lambda: (handler.convertBlocksToDialogData(), handler.updateReferences()))
+        runPhase(results, 'save', lambda: dialog_xls2xml.saveDialogDataToFileSystem(handler.getDialogData(), XMLHandler(), config))
+        return len(handler.getDialogData().getAllNodes()), results
+    finally:
+        shutil.rmtree(outputPath)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measures dialog_xls2xml on synthetic T2C workbooks', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('numberOfRows', nargs='*', type=int, default=[10000, 100000], help='number of rows of all workbooks (one measurement for each)')
+    parser.add_argument('-w', '--workbooks', type=int, default=10, help='number of workbooks')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes parsing workbooks')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the corpus generator')
+    args = parser.parse_args(argv)
+
+    print('%10s %10s %10s %12s %12s' % ('rows', 'nodes', 'phase', 'time [s]', 'memory [MB]'))
+    for numberOfRows in args.numberOfRows:
+        dirPath = tempfile.mkdtemp()
+        try:
+            filePaths = writeCorpus(dirPath, numberOfRows, args.workbooks, args.seed)
+            # every corpus is measured in a new process so that peak memory is not influenced by previous measurements
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                numberOfNodes, results = executor.submit(benchmarkCorpus, filePaths, args.jobs).result()
+        finally:
+            shutil.rmtree(dirPath)
+        for phase in PHASES:
+            phaseTime, memory = results[phase]
+            print('%10d %10d %10s %12.3f %12s' % (numberOfRows, numberOfNodes, phase, phaseTime, '%.1f' % memory if memory is not None else '-'))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,55 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from DialogData import DialogData
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestMain(BaseTestCaseCapture):
+
+    def test_uniqueNodeNames(self):
+        """Tests if node names get the lowest unused number."""
+        dialogData = DialogData(None)
+        names = []
+        for _ in range(4):
+            names.append(dialogData.createUniqueNodeName(u'hello'))
+            dialogData.createNode(names[-1])
+        assert names == [u'HELLO', u'HELLO_0', u'HELLO_1', u'HELLO_2']
+
+        # name which is not used is offered again
+        assert dialogData.createUniqueNodeName(u'hello') == u'HELLO_3'
+        assert dialogData.createUniqueNodeName(u'hello') == u'HELLO_3'
+
+        # number used by other node is skipped
+        dialogData.createNode(u'HELLO_3')
+        dialogData.createNode(u'HELLO_4')
+        assert dialogData.createUniqueNodeName(u'hello') == u'HELLO_5'
+
+    def test_uniqueIntentNames(self):
+        """Tests if intent names are unique among intents only."""
+        dialogData = DialogData(None)
+        dialogData.createIntent(dialogData.createUniqueIntentName(u'order'))
+        dialogData.createIntent(dialogData.createUniqueIntentName(u'order'))
+        assert dialogData.createUniqueIntentName(u'order') == u'order1'
+        assert dialogData.createUniqueNodeName(u'order') == u'ORDER'
+
+    def test_manyUniqueNames(self):
+        """Tests if there is no limit of the number of names with the same base."""
+        dialogData = DialogData(None)
+        for index in range(20001):
+            name = dialogData.createUniqueNodeName(u'again')
+            dialogData.createNode(name)
+        assert name == u'AGAIN_19999'
@@ -0,0 +1,75 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+import stat
+
+import pytest
+
+import cacheCommons
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestWriteFileIfChanged(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'writeFileIfChanged_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        # create output folder
+        BaseTestCaseCapture.createFolder(TestWriteFileIfChanged.testOutputPath)
+
+    def callfunc(self, *args, **kwargs):
+        return cacheCommons.writeFileIfChanged(*args, **kwargs)
+
+    @staticmethod
+    def getMode(filePath):
+        return stat.S_IMODE(os.stat(filePath).st_mode)
+
+    @pytest.mark.skipif(os.name != 'posix', reason='file permissions are POSIX specific')
+    def test_newFileMode(self):
+        ''' Test if new file gets the same permissions as a file created by open (umask is applied)'''
+        filePath = os.path.join(self.testOutputPath, 'newFile.txt')
+        umask = os.umask(0o022)
+        try:
+            cacheCommons.writeFileIfChanged(filePath, 'content\n')
+        finally:
+            os.umask(umask)
+        assert self.getMode(filePath) == 0o644
+
+    @pytest.mark.skipif(os.name != 'posix', reason='file permissions are POSIX specific')
+    def test_changedFileMode(self):
+        ''' Test if changed file keeps its permissions'''
+        filePath = os.path.join(self.testOutputPath, 'changedFile.txt')
+        cacheCommons.writeFileIfChanged(filePath, 'content\n')
+        os.chmod(filePath, 0o640)
+        cacheCommons.writeFileIfChanged(filePath, 'changed content\n')
+        assert self.getMode(filePath) == 0o640
+
+    @pytest.mark.parametrize('linesep', ['\n', '\r\n'])
+    def test_lineEnds(self, monkeypatch, linesep):
+        ''' Test if line ends are translated to os.linesep as in text mode and the returned hash is the hash of the file'''
+        filePath = os.path.join(self.testOutputPath, 'lineEnds.txt')
+        monkeypatch.setattr(os, 'linesep', linesep)
+        contentHash = cacheCommons.writeFileIfChanged(filePath, 'first\nsecond\n')
+        with open(filePath, 'rb') as writtenFile:
+            assert writtenFile.read() == ('first' + linesep + 'second' + linesep).encode('utf-8')
+        assert contentHash == cacheCommons.hashFile(filePath)
+        # the same content is recognized as unchanged
+        modificationTime = os.stat(filePath).st_mtime_ns
+        assert cacheCommons.writeFileIfChanged(filePath, 'first\nsecond\n') == contentHash
+        assert os.stat(filePath).st_mtime_ns == modificationTime
@@ -0,0 +1,69 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import os
+import stat
+
+import pytest
+
+import cacheCommons
+from DialogData import DialogData
+from XMLHandler import XMLHandler
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestWriteStreamIfChanged(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'writeStreamIfChanged_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        # create output folder
+        BaseTestCaseCapture.createFolder(TestWriteStreamIfChanged.testOutputPath)
+
+    def callfunc(self, *args, **kwargs):
+        return cacheCommons.writeStreamIfChanged(*args, **kwargs)
+
+    @pytest.mark.skipif(os.name != 'posix', reason='file permissions are POSIX specific')
+    def test_fileMode(self):
+        ''' Test if new file gets the same permissions as a file created by open and changed file keeps its permissions'''
+        filePath = os.path.join(self.testOutputPath, 'mode.txt')
+        umask = os.umask(0o022)
+        try:
+            cacheCommons.writeStreamIfChanged(filePath, lambda binaryFile: binaryFile.write(b'content\n'))
+        finally:
+            os.umask(umask)
+        assert stat.S_IMODE(os.stat(filePath).st_mode) == 0o644
+        os.chmod(filePath, 0o640)
+        cacheCommons.writeStreamIfChanged(filePath, lambda binaryFile: binaryFile.write(b'changed content\n'))
+        assert stat.S_IMODE(os.stat(filePath).st_mode) == 0o640
+
+    @pytest.mark.parametrize('linesep', ['\n', '\r\n'])
+    def test_lineEnds(self, monkeypatch, linesep):
+        ''' Test if streamed dialog is the same as the pretty printed dialog written in text mode'''
+        monkeypatch.setattr(os, 'linesep', linesep)
+        dialogData = DialogData(None)
+        for index in range(3):
+            dialogData.createNode(u'NODE_%d' % index, u'domain').setCondition(u'#INTENT_%d' % index)
+        handler = XMLHandler()
+        nodes = dialogData.getAllDomains()[u'domain']
+        filePath = os.path.join(self.testOutputPath, 'dialog.xml')
+
+        contentHash = cacheCommons.writeStreamIfChanged(filePath, lambda dialogFile: handler.writeDialogData(dialogData, nodes, dialogFile))
+        with open(filePath, 'rb') as dialogFile:
+            assert dialogFile.read() == handler.printXml(handler.convertDialogData(dialogData, nodes)).replace('\n', linesep).encode('utf-8')
+        assert contentHash == cacheCommons.hashFile(filePath)
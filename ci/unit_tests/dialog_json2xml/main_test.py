@@ -13,6 +13,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import json
 import os
 
 from lxml import etree
@@ -88,3 +89,32 @@ class TestMain(BaseTestCaseCapture):
 
         self.t_noException([[inputJsonPath, '-d', outputXmlDirPath]])
         self._assertXmlEqual(expectedXmlPath, outputXmlPath)
+
+    def test_mainLongSiblingChain(self):
+        """Tests if the script converts dialog with long chain of siblings and nodes in any order."""
+        numberOfNodes = 5000
+        dialogNodesJSON = []
+        for index in range(numberOfNodes):
+            nodeJSON = {'dialog_node': 'NODE_' + str(index), 'conditions': '#INTENT_' + str(index)}
+            if index > 0:
+                nodeJSON['previous_sibling'] = 'NODE_' + str(index - 1)
+            dialogNodesJSON.append(nodeJSON)
+            dialogNodesJSON.append({'dialog_node': 'CHILD_' + str(index), 'parent': 'NODE_' + str(index)})
+        dialogNodesJSON.reverse()
+
+        inputJsonPath = os.path.join(self.testOutputPath, 'inputLongSiblingChain.json')
+        with open(inputJsonPath, 'w') as inputJsonFile:
+            json.dump(dialogNodesJSON, inputJsonFile)
+
+        outputXmlDirPath = os.path.join(self.testOutputPath, 'outputLongSiblingChainResult')
+        outputXmlPath = os.path.join(outputXmlDirPath, 'dialog.xml')
+
+        BaseTestCaseCapture.createFolder(outputXmlDirPath)
+
+        self.t_noException([[inputJsonPath, '-d', outputXmlDirPath]])
+
+        with open(outputXmlPath, 'r') as outputXmlFile:
+            outputXml = etree.XML(outputXmlFile.read())
+        assert [node.get('name') for node in outputXml] == ['NODE_' + str(index) for index in range(numberOfNodes)]
+        for index, node in enumerate(outputXml):
+            assert [child.get('name') for child in node.find('nodes')] == ['CHILD_' + str(index)]
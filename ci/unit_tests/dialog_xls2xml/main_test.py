@@ -0,0 +1,196 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+
+from openpyxl import Workbook
+
+import dialog_xls2xml
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestMain(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        # create output folder
+        BaseTestCaseCapture.createFolder(TestMain.testOutputPath)
+
+
+    def callfunc(self, *args, **kwargs):
+        dialog_xls2xml.main(*args, **kwargs)
+
+    @staticmethod
+    def writeWorkbook(filePath, rows):
+        """Writes T2C workbook with a single sheet containing the rows"""
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(filePath)
+
+    @staticmethod
+    def readFiles(dirPath):
+        """Returns dictionary relative path -> content of all files in the directory"""
+        files = {}
+        for root, _, fileNames in os.walk(dirPath):
+            for fileName in fileNames:
+                with open(os.path.join(root, fileName), 'r') as f:
+                    files[os.path.relpath(os.path.join(root, fileName), dirPath)] = f.read()
+        return files
+
+    def createWorkbooks(self, xlsDirPath):
+        BaseTestCaseCapture.createFolder(xlsDirPath)
+        self.writeWorkbook(os.path.join(xlsDirPath, 'greetings.xlsx'), [
+            ['#HELLO'], ['hi', 'Hello!'], ['good morning'], [],
+            ['#BYE'], ['bye', 'Goodbye!'], ['see you']])
+        self.writeWorkbook(os.path.join(xlsDirPath, 'shop.xlsx'), [
+            ['#BUY'], ['I want to buy something', 'What do you want to buy?'], [],
+            ['@product'], ['phone;mobile'], ['tablet']])
+
+    def getArgs(self, xlsDirPath, outputDirPath, jobs):
+        return ['-x', xlsDirPath,
+                '-gd', os.path.join(outputDirPath, 'dialogs'),
+                '-gi', os.path.join(outputDirPath, 'intents'),
+                '-ge', os.path.join(outputDirPath, 'entities'),
+                '-j', jobs]
+
+    def test_mainParallel(self):
+        """Tests if workbooks parsed in parallel produce the same output as workbooks parsed sequentially."""
+        xlsDirPath = os.path.join(self.testOutputPath, 'parallelInput')
+        self.createWorkbooks(xlsDirPath)
+
+        outputs = []
+        for jobs in ['1', '2']:
+            outputDirPath = os.path.join(self.testOutputPath, 'parallelResult' + jobs)
+            BaseTestCaseCapture.createFolder(outputDirPath)
+            self.t_noException([self.getArgs(xlsDirPath, outputDirPath, jobs)])
+            outputs.append(self.readFiles(outputDirPath))
+
+        assert outputs[0] == outputs[1]
+        assert sorted(outputs[0]) == [os.path.join('dialogs', 'greetings.xml'), os.path.join('dialogs', 'shop.xml'),
+                                      os.path.join('entities', 'product.csv'), os.path.join('intents', 'BUY.csv'),
+                                      os.path.join('intents', 'BYE.csv'), os.path.join('intents', 'HELLO.csv')]
+
+    def test_mainCache(self):
+        """Tests if blocks of unchanged workbooks are taken from the cache and changed workbooks are parsed again."""
+        xlsDirPath = os.path.join(self.testOutputPath, 'cacheInput')
+        cacheDirPath = os.path.join(self.testOutputPath, 'cache')
+        outputDirPath = os.path.join(self.testOutputPath, 'cacheResult')
+        self.createWorkbooks(xlsDirPath)
+        BaseTestCaseCapture.createFolder(cacheDirPath)
+        BaseTestCaseCapture.createFolder(outputDirPath)
+        args = self.getArgs(xlsDirPath, outputDirPath, '1') + ['-cd', cacheDirPath]
+
+        self.t_noException([args])
+        generatedFiles = self.readFiles(outputDirPath)
+        # one entry for each workbook
+        assert len(os.listdir(os.path.join(cacheDirPath, 'XLSXHandler'))) == 2
+
+        self.t_noExceptionAndLogMessage("reusing cached blocks", [args])
+        assert self.readFiles(outputDirPath) == generatedFiles
+
+        # changed workbook is parsed again
+        self.writeWorkbook(os.path.join(xlsDirPath, 'shop.xlsx'), [
+            ['#BUY'], ['I want to buy something', 'What do you want to buy today?']])
+        self.t_noException([args])
+        shopXml = self.readFiles(outputDirPath)[os.path.join('dialogs', 'shop.xml')]
+        assert 'What do you want to buy today?' in shopXml
+
+    def test_mainSpawn(self):
+        """Tests if workbooks can be parsed (and cached) by worker processes started by spawn (default on Windows and macOS)."""
+        xlsDirPath = os.path.join(self.testOutputPath, 'spawnInput')
+        cacheDirPath = os.path.join(self.testOutputPath, 'spawnCache')
+        outputDirPath = os.path.join(self.testOutputPath, 'spawnResult')
+        self.createWorkbooks(xlsDirPath)
+        BaseTestCaseCapture.createFolder(outputDirPath)
+        args = self.getArgs(xlsDirPath, outputDirPath, '2') + ['-cd', cacheDirPath]
+
+        startMethod = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        try:
+            self.t_noException([args])
+            generatedFiles = self.readFiles(outputDirPath)
+            self.t_noException([args])
+        finally:
+            multiprocessing.set_start_method(startMethod, force=True)
+        assert self.readFiles(outputDirPath) == generatedFiles
+        assert len(os.listdir(os.path.join(cacheDirPath, 'XLSXHandler'))) == 2
+
+    def test_mainCSV(self):
+        """Tests if sheets exported to CSV and TSV produce the same output as the workbook."""
+        xlsDirPath = os.path.join(self.testOutputPath, 'csvInputXlsx')
+        csvDirPath = os.path.join(self.testOutputPath, 'csvInputCsv')
+        self.createWorkbooks(xlsDirPath)
+        BaseTestCaseCapture.createFolder(csvDirPath)
+        greetingsRows = [['#HELLO'], ['hi', 'Hello!'], ['good morning'], [],
+                         ['#BYE'], ['bye', 'Goodbye!'], ['see you']]
+        shopRows = [['#BUY'], ['I want to buy something', 'What do you want to buy?'], [],
+                    ['@product'], ['phone;mobile'], ['tablet']]
+        # the file name is <domain>.<sheet>.csv, sheets of the same workbook are generated to one dialog
+        for fileName, rows, delimiter in [('greetings.Sheet.csv', greetingsRows[:4], ','), ('greetings.Other sheet.tsv', greetingsRows[4:], '\t'),
+                                          ('shop.csv', shopRows, ',')]:
+            with open(os.path.join(csvDirPath, fileName), 'w', newline='', encoding='utf-8') as csvFile:
+                csv.writer(csvFile, delimiter=delimiter).writerows(rows)
+
+        outputs = []
+        for inputArgs in [['-x', os.path.join(xlsDirPath, 'greetings.xlsx'), '-x', os.path.join(xlsDirPath, 'shop.xlsx')],
+                          ['-x', os.path.join(csvDirPath, 'greetings.Sheet.csv'), '-x', os.path.join(csvDirPath, 'greetings.Other sheet.tsv'),
+                           '-x', os.path.join(csvDirPath, 'shop.csv')]]:
+            outputDirPath = os.path.join(self.testOutputPath, 'csvResult' + str(len(outputs)))
+            BaseTestCaseCapture.createFolder(outputDirPath)
+            self.t_noException([inputArgs + self.getArgs(xlsDirPath, outputDirPath, '1')[2:]])
+            outputs.append(self.readFiles(outputDirPath))
+
+        assert outputs[0] == outputs[1]
+
+    def test_mainManifest(self):
+        """Tests if unchanged generated files are not rewritten and files which are not generated anymore are removed."""
+        xlsDirPath = os.path.join(self.testOutputPath, 'manifestInput')
+        outputDirPath = os.path.join(self.testOutputPath, 'manifestResult')
+        manifestPath = os.path.join(outputDirPath, 'manifest.json')
+        self.createWorkbooks(xlsDirPath)
+        BaseTestCaseCapture.createFolder(outputDirPath)
+        args = self.getArgs(xlsDirPath, outputDirPath, '1') + ['-gm', manifestPath]
+
+        self.t_noException([args])
+        with open(manifestPath, 'r') as manifestFile:
+            manifest = json.load(manifestFile)['files']
+        assert sorted(manifest) == ['dialogs/greetings.xml', 'dialogs/shop.xml', 'entities/product.csv',
+                                    'intents/BUY.csv', 'intents/BYE.csv', 'intents/HELLO.csv']
+        for fileName, fileHash in manifest.items():
+            with open(os.path.join(outputDirPath, fileName), 'rb') as generatedFile:
+                assert hashlib.sha256(generatedFile.read()).hexdigest() == fileHash
+
+        # unchanged files are not written again
+        modificationTimes = {fileName: os.stat(os.path.join(outputDirPath, fileName)).st_mtime_ns for fileName in manifest}
+        self.t_noException([args])
+        assert {fileName: os.stat(os.path.join(outputDirPath, fileName)).st_mtime_ns for fileName in manifest} == modificationTimes
+
+        # files generated from the removed entity are removed, other files are kept
+        self.writeWorkbook(os.path.join(xlsDirPath, 'shop.xlsx'), [
+            ['#BUY'], ['I want to buy something', 'What do you want to buy?']])
+        self.t_noExceptionAndLogMessage("Removed file", [args])
+        assert not os.path.exists(os.path.join(outputDirPath, 'entities', 'product.csv'))
+        assert os.stat(os.path.join(outputDirPath, 'dialogs', 'greetings.xml')).st_mtime_ns == modificationTimes['dialogs/greetings.xml']
+        with open(manifestPath, 'r') as manifestFile:
+            assert 'entities/product.csv' not in json.load(manifestFile)['files']
@@ -0,0 +1,51 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import io
+
+from DialogData import DialogData
+from XMLHandler import XMLHandler
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestMain(BaseTestCaseCapture):
+
+    def createDialogData(self):
+        dialogData = DialogData(None)
+        for index in range(3):
+            nodeData = dialogData.createNode(u'NODE_%d' % index, u'domain')
+            nodeData.setCondition(u'#INTENT_%d && $a < 1' % index)
+            nodeData.addRawOutput((u'Answer č. %d%%%%$visited=true%%%%4Spoken answer' % index, u'Yes=yes;No=no' if index else None, u'NODE_0'), {})
+        return dialogData
+
+    def test_sameAsPrintXml(self):
+        """Tests if streamed XML is the same as pretty printed XML of the whole domain."""
+        dialogData = self.createDialogData()
+        handler = XMLHandler()
+        for nodes in [dialogData.getAllDomains()[u'domain'], []]:
+            outputFile = io.BytesIO()
+            handler.writeDialogData(dialogData, nodes, outputFile)
+            assert outputFile.getvalue().decode('utf-8') == handler.printXml(handler.convertDialogData(dialogData, nodes))
+
+    def test_missingNode(self):
+        """Tests if nodes without definition are skipped."""
+        dialogData = self.createDialogData()
+        handler = XMLHandler()
+        outputFile = io.BytesIO()
+        handler.writeDialogData(dialogData, [u'MISSING', u'NODE_1'], outputFile)
+        output = outputFile.getvalue().decode('utf-8')
+        assert output.startswith(u'<nodes>\n  <node name="NODE_1">\n    <condition>#INTENT_1 &amp;&amp; $a &lt; 1</condition>\n')
+        assert u'MISSING' not in output
@@ -0,0 +1,57 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dialog_xml2json import DialogCompiler
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestDialogCompiler(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    inputOutputPairs = [
+        ('inputActionsValid.xml', 'expectedActionsValid.json'),
+        ('inputBoolValid.xml', 'expectedBoolValid.json'),
+        ('inputNodeTypesValid.xml', 'expectedNodeTypesValid.json'),
+    ]
+
+    def compileDialog(self, inputXml):
+        config = argparse.Namespace(common_dialog_main=os.path.join(self.dataBasePath, inputXml),
+                                    common_schema=self.dialogSchemaPath)
+        return DialogCompiler(config).compile()
+
+    def loadExpected(self, expectedJson):
+        with open(os.path.join(self.dataBasePath, expectedJson), 'r') as expectedJsonFile:
+            return json.load(expectedJsonFile)
+
+    def test_repeatedCompilation(self):
+        """Tests if compiling the same dialog repeatedly in one process gives always the same result."""
+        for inputXml, expectedJson in self.inputOutputPairs:
+            expected = self.loadExpected(expectedJson)
+            for _ in range(3):
+                assert self.compileDialog(inputXml) == expected
+
+    def test_parallelCompilation(self):
+        """Tests if several dialogs compiled in parallel threads do not share any state."""
+        inputs = [pair for pair in self.inputOutputPairs for _ in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda pair: self.compileDialog(pair[0]), inputs))
+        for (inputXml, expectedJson), result in zip(inputs, results):
+            assert result == self.loadExpected(expectedJson)
@@ -0,0 +1,66 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+
+import lxml.etree as LET
+
+from dialog_xml2json import convertAll
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestConvertAll(BaseTestCaseCapture):
+
+    def callfunc(self, xml, upperNodeJson=None):
+        upperNodeJson = {} if upperNodeJson is None else upperNodeJson
+        convertAll(upperNodeJson, LET.fromstring(xml))
+        return upperNodeJson
+
+    def test_valuesAndStructures(self):
+        """Tests conversion of typed values, empty structures, nil values and lists (order of keys is kept)."""
+        xml = ('<output xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+               '<text>  a &amp;lt; b  </text><count type="number">3</count><ratio type="number">0.5</ratio>'
+               '<flag type="boolean">false</flag><none xsi:nil="true"><ignored>x</ignored></none>'
+               '<list structure="emptyList"/><dict structure="emptyDict"/><empty/>'
+               '<generic><values>v1</values></generic><generic><values structure="listItem">v2</values></generic>'
+               '</output>')
+        outputJson = self.callfunc(xml)
+        assert json.dumps(outputJson) == json.dumps({'output': {
+            'text': 'a < b', 'count': 3, 'ratio': 0.5, 'flag': False, 'none': None, 'list': [], 'dict': {}, 'empty': '',
+            'generic': [{'values': 'v1'}, {'values': ['v2']}]}})
+
+    def test_invalidValues(self):
+        """Tests if number which can not be parsed is left out and boolean which can not be parsed is kept as a string."""
+        outputJson = self.callfunc('<context><a type="number">x</a><b type="boolean">maybe</b><c>c</c></context>')
+        assert json.dumps(outputJson) == json.dumps({'context': {'b': 'maybe', 'c': 'c'}})
+
+    def test_upperNodeList(self):
+        """Tests if the element is converted to the last item when the upper node is a list."""
+        assert self.callfunc('<action><name>a</name></action>', ['first', None]) == ['first', {'name': 'a'}]
+
+    def test_deepNesting(self):
+        """Tests if deeply nested elements do not hit the recursion limit."""
+        depth = 2000
+        contextXml = element = LET.Element('context')
+        for _ in range(depth):
+            element = LET.SubElement(element, 'a')
+        element.text = 'x'
+        outputJson = {}
+        convertAll(outputJson, contextXml)
+        value = outputJson['context']
+        for _ in range(depth - 1):
+            value = value['a']
+        assert value == {'a': 'x'}
@@ -15,6 +15,7 @@ limitations under the License.
 
 import json
 import os
+import shutil
 import lxml
 import dialog_xml2json
 
@@ -144,3 +145,220 @@ class TestMain(BaseTestCaseCapture):
 
         self.t_exitCodeAndLogMessage(1, "The value 'random_type' is not an element of the set",
                             [['--common_dialog_main', inputXmlPath, '--common_schema', self.dialogSchemaPath]])
+
+    def test_mainCache(self):
+        """Tests if the cached dialog is reused when no input changed and regenerated when imported file changed."""
+        inputDirPath = os.path.join(self.testOutputPath, 'cacheInput')
+        cacheDirPath = os.path.join(self.testOutputPath, 'cache')
+        outputJsonDirPath = os.path.join(self.testOutputPath, 'outputCacheResult')
+        outputJsonPath = os.path.join(outputJsonDirPath, 'dialog.json')
+
+        BaseTestCaseCapture.createFolder(cacheDirPath)
+        BaseTestCaseCapture.createFolder(outputJsonDirPath)
+        if os.path.exists(inputDirPath):
+            shutil.rmtree(inputDirPath)
+        shutil.copytree(os.path.join(self.dataBasePath, 'cache'), inputDirPath)
+
+        args = ['--common_dialog_main', os.path.join(inputDirPath, 'main.xml'),
+                '--common_outputs_dialogs', 'dialog.json',
+                '--common_outputs_directory', outputJsonDirPath,
+                '--common_cache_directory', cacheDirPath,
+                '--common_schema', self.dialogSchemaPath]
+
+        self.t_noException([args])
+        with open(outputJsonPath, 'r') as outputJsonFile:
+            generatedJson = json.load(outputJsonFile)
+        os.remove(outputJsonPath)
+        # both the root and the imported file were validated
+        assert len(os.listdir(os.path.join(cacheDirPath, 'dialog_xml2json', 'validation'))) == 2
+
+        self.t_noExceptionAndLogMessage("reusing cached dialog", [args])
+        with open(outputJsonPath, 'r') as outputJsonFile:
+            assert json.load(outputJsonFile) == generatedJson
+
+        # change of imported file invalidates the cache
+        with open(os.path.join(inputDirPath, 'imported.xml'), 'r') as importedFile:
+            importedXml = importedFile.read()
+        with open(os.path.join(inputDirPath, 'imported.xml'), 'w') as importedFile:
+            importedFile.write(importedXml.replace('Imported node', 'Changed node'))
+
+        self.t_noException([args])
+        with open(outputJsonPath, 'r') as outputJsonFile:
+            outputJson = json.load(outputJsonFile)
+        assert outputJson != generatedJson
+        assert next(node for node in outputJson if node['dialog_node'] == 'IMPORTED')['output']['text'] == 'Changed node'
+
+    def test_mainDuplicitNodeNames(self):
+        """Tests if the script fails with duplicit node names (only nodes in scope are taken into account)."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputDuplicitNames.xml'))
+
+        self.t_exitCodeAndLogMessage(1, "Duplicit node name found: 'NODE_B'",
+                            [['--common_dialog_main', inputXmlPath]])
+
+        self.t_exitCodeAndLogMessage(1, "Duplicit node name found: 'NODE_A'",
+                            [['--common_dialog_main', inputXmlPath, '--common_scope', 'type-local']])
+
+    def test_mainScopes(self):
+        """Tests if dialog built for several scopes at once is the same as dialogs built for each scope separately."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputScopes.xml'))
+        scopes = ['type-local', 'type-server']
+
+        outputJsonDirPath = os.path.join(self.testOutputPath, 'outputScopesResult')
+        BaseTestCaseCapture.createFolder(outputJsonDirPath)
+
+        self.t_noException([['--common_dialog_main', inputXmlPath,
+                            '--common_outputs_dialogs', 'dialog.json',
+                            '--common_outputs_directory', outputJsonDirPath,
+                            '--common_schema', self.dialogSchemaPath,
+                            '--common_scopes'] + scopes])
+
+        for scope in scopes:
+            expectedJsonDirPath = os.path.join(self.testOutputPath, 'outputScopesExpected', scope)
+            BaseTestCaseCapture.createFolder(expectedJsonDirPath)
+            self.t_noException([['--common_dialog_main', inputXmlPath,
+                                '--common_outputs_dialogs', 'dialog.json',
+                                '--common_outputs_directory', expectedJsonDirPath,
+                                '--common_schema', self.dialogSchemaPath,
+                                '--common_scope', scope]])
+
+            with open(os.path.join(expectedJsonDirPath, 'dialog.json'), 'r') as expectedJsonFile, \
+                 open(os.path.join(outputJsonDirPath, scope, 'dialog.json'), 'r') as outputJsonFile:
+                outputJson = json.load(outputJsonFile)
+                assert json.load(expectedJsonFile) == outputJson
+
+            dialogNodeNames = [node['dialog_node'] for node in outputJson]
+            assert ('LOCAL_ONLY' in dialogNodeNames) == (scope == 'type-local')
+            assert ('SERVER_ONLY' in dialogNodeNames) == (scope == 'type-server')
+
+    def test_mainInvalidImport(self):
+        """Tests if the script fails with invalid imported file (imported files loaded in parallel)."""
+        inputDirPath = os.path.join(self.testOutputPath, 'invalidImportInput')
+        if os.path.exists(inputDirPath):
+            shutil.rmtree(inputDirPath)
+        shutil.copytree(os.path.join(self.dataBasePath, 'cache'), inputDirPath)
+
+        with open(os.path.join(inputDirPath, 'imported.xml'), 'r') as importedFile:
+            importedXml = importedFile.read()
+        with open(os.path.join(inputDirPath, 'imported.xml'), 'w') as importedFile:
+            importedFile.write(importedXml.replace('<condition>', '<nonexistentElement/><condition>', 1))
+
+        self.t_exitCodeAndLogMessage(1, "Invalid imported XML: " + os.path.join(inputDirPath, 'imported.xml'),
+                            [['--common_dialog_main', os.path.join(inputDirPath, 'main.xml'),
+                            '--common_schema', self.dialogSchemaPath,
+                            '--common_jobs', '4']])
+
+    def test_mainAutogenerateInheritance(self):
+        """Tests if every subtree inherits settings of autogenerated nodes it does not override."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputAutogenerateInheritance.xml'))
+
+        outputJsonDirPath = os.path.join(self.testOutputPath, 'outputAutogenerateInheritanceResult')
+        outputJsonPath = os.path.join(outputJsonDirPath, 'dialog.json')
+
+        BaseTestCaseCapture.createFolder(outputJsonDirPath)
+
+        self.t_noException([['--common_dialog_main', inputXmlPath,
+                            '--common_outputs_dialogs', 'dialog.json',
+                            '--common_outputs_directory', outputJsonDirPath,
+                            '--common_schema', self.dialogSchemaPath]])
+
+        with open(outputJsonPath, 'r') as outputJsonFile:
+            outputJson = json.load(outputJsonFile)
+
+        abortNodes = dict((node['parent'], node) for node in outputJson if node['dialog_node'].startswith('ABORT_') and 'parent' in node)
+        assert abortNodes['ORDER']['output']['text'] == 'Order cancelled.'
+        assert abortNodes['RESERVATION']['output']['text'] == 'Reservation cancelled.'
+        assert abortNodes['HELP']['output']['text'] == 'Returning to the beginning.'
+        for abortNode in abortNodes.values():
+            assert abortNode['next_step']['dialog_node'] == 'WELCOME'
+
+    def test_mainProfile(self):
+        """Tests if the script writes report with all the compilation phases."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'cache', 'main.xml'))
+
+        outputJsonDirPath = os.path.join(self.testOutputPath, 'outputProfileResult')
+        profilePath = os.path.join(outputJsonDirPath, 'profile.json')
+
+        BaseTestCaseCapture.createFolder(outputJsonDirPath)
+
+        self.t_noException([['--common_dialog_main', inputXmlPath,
+                            '--common_outputs_dialogs', 'dialog.json',
+                            '--common_outputs_directory', outputJsonDirPath,
+                            '--common_schema', self.dialogSchemaPath,
+                            '--profile', profilePath]])
+
+        with open(profilePath, 'r') as profileFile:
+            profile = json.load(profileFile)
+
+        assert list(profile['phases']) == ['parse', 'validate', 'importNodes', 'preprocess', 'generateNodes', 'emit']
+        # root and imported file are parsed and validated
+        assert profile['phases']['parse']['calls'] == 2
+        assert profile['phases']['validate']['calls'] == 2
+        assert sum(phase['time'] for phase in profile['phases'].values()) <= profile['total']['time']
+        if profile['total']['memory'] is not None:
+            # memory changes of the phases (measured exclusively) can not exceed the memory of the process
+            assert all(isinstance(phase['memoryChange'], int) for phase in profile['phases'].values())
+            assert sum(phase['memoryChange'] for phase in profile['phases'].values()) <= profile['total']['memory']
+
+    def test_mainScopedImports(self):
+        """Tests if imports out of scope (given by import element or by root of imported file) are skipped."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'scopedImports', 'main.xml'))
+        scopes = ['type-local', 'type-server']
+
+        outputJsonDirPath = os.path.join(self.testOutputPath, 'outputScopedImportsResult')
+        BaseTestCaseCapture.createFolder(outputJsonDirPath)
+
+        # nonexistent imported file is out of both scopes, it is not read
+        self.t_noException([['--common_dialog_main', inputXmlPath,
+                            '--common_outputs_dialogs', 'dialog.json',
+                            '--common_outputs_directory', outputJsonDirPath,
+                            '--common_schema', self.dialogSchemaPath,
+                            '--common_scopes'] + scopes])
+
+        for scope in scopes:
+            with open(os.path.join(outputJsonDirPath, scope, 'dialog.json'), 'r') as outputJsonFile:
+                dialogNodeNames = [node['dialog_node'] for node in json.load(outputJsonFile)]
+            assert dialogNodeNames[0] == 'WELCOME' and dialogNodeNames[-1] == 'ELSE'
+            assert ('LOCAL_ONLY' in dialogNodeNames) == (scope == 'type-local')
+            assert ('SERVER_ONLY' in dialogNodeNames) == (scope == 'type-server')
+
+        self.t_exitCodeAndLogMessage(1, "Imported dialog file " + os.path.join(os.path.dirname(inputXmlPath), "nonexistentImport.xml") + " not found.",
+                                    [['--common_dialog_main', inputXmlPath, '--common_scope', 'type-test']])
+
+    def test_mainOutOfScopeImportsNotLoaded(self):
+        """Tests if files out of loaded scopes are not parsed nor validated even when imports are loaded in parallel."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'outOfScopeImports', 'main.xml'))
+
+        # test.xml has root out of both scopes, invalid.xml is imported by a node out of the scope of its import,
+        # both files are invalid, so they would be reported if they were validated
+        for jobs in ['1', '4']:
+            for scopeArgs in [['--common_scope', 'type-local'], ['--common_scopes', 'type-local', 'type-server']]:
+                outputJsonDirPath = os.path.join(self.testOutputPath, 'outputOutOfScopeImportsResult' + jobs)
+                BaseTestCaseCapture.createFolder(outputJsonDirPath)
+                self.t_noException([['--common_dialog_main', inputXmlPath,
+                                    '--common_outputs_dialogs', 'dialog.json',
+                                    '--common_outputs_directory', outputJsonDirPath,
+                                    '--common_schema', self.dialogSchemaPath,
+                                    '--common_jobs', jobs] + scopeArgs])
+                assert 'Invalid imported XML' not in self.logs.text
+                self.caplog.clear()
+
+    def test_mainNestedImports(self):
+        """Tests if files imported by imported files are merged in the same order when they are loaded in parallel."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'nestedImports', 'main.xml'))
+
+        outputs = []
+        for jobs in ['1', '4']:
+            outputJsonDirPath = os.path.join(self.testOutputPath, 'outputNestedImportsResult' + jobs)
+            BaseTestCaseCapture.createFolder(outputJsonDirPath)
+            self.t_noException([['--common_dialog_main', inputXmlPath,
+                                '--common_outputs_dialogs', 'dialog.json',
+                                '--common_outputs_directory', outputJsonDirPath,
+                                '--common_schema', self.dialogSchemaPath,
+                                '--common_jobs', jobs]])
+            with open(os.path.join(outputJsonDirPath, 'dialog.json'), 'r') as outputJsonFile:
+                outputs.append(json.load(outputJsonFile))
+
+        assert outputs[0] == outputs[1]
+        dialogNodeNames = [node['dialog_node'] for node in outputs[0]]
+        assert dialogNodeNames == ['WELCOME', 'MENU', 'ORDERS', 'node_2', 'PAYMENTS', 'MENU_ELSE', 'node_1', 'node_0', 'ELSE']
+        assert len([node for node in outputs[0] if node.get('conditions') == '#HELP']) == 3
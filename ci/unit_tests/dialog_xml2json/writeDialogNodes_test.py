@@ -0,0 +1,53 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import io
+import json
+import os
+
+from dialog_xml2json import writeDialogNodes
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestWriteDialogNodes(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+
+    def callfunc(self, *args, **kwargs):
+        outputFile = io.StringIO()
+        writeDialogNodes(*args, outputFile=outputFile, **kwargs)
+        return outputFile.getvalue()
+
+    def test_sameAsJsonDumps(self):
+        """Tests if the written dialog is the same as the whole list serialized by json.dumps."""
+        for expectedJson in ['expectedActionsValid.json', 'expectedBoolValid.json', 'expectedNodeTypesValid.json']:
+            with open(os.path.join(self.dataBasePath, expectedJson), 'r') as expectedJsonFile:
+                dialogNodes = json.load(expectedJsonFile)
+            assert self.callfunc(iter(dialogNodes)) == json.dumps(dialogNodes, indent=4, ensure_ascii=False)
+
+    def test_emptyAndUnicode(self):
+        """Tests empty dialog and nodes with non-ascii characters and new lines in values."""
+        assert self.callfunc(iter([])) == json.dumps([], indent=4)
+        assert self.callfunc(iter([]), compact=True) == '[]'
+        dialogNodes = [{'dialog_node': 'uzel_č', 'output': {'text': 'line\nnext line', 'values': [1, 2.5, None, True, {}]}}, {'dialog_node': 'second'}]
+        assert self.callfunc(iter(dialogNodes)) == json.dumps(dialogNodes, indent=4, ensure_ascii=False)
+
+    def test_compact(self):
+        """Tests if compact output contains no whitespace between tokens and it is valid json."""
+        dialogNodes = [{'dialog_node': 'first', 'output': {'text': 'a b'}}, {'dialog_node': 'second'}]
+        output = self.callfunc(iter(dialogNodes), compact=True)
+        assert output == '[{"dialog_node":"first","output":{"text":"a b"}},{"dialog_node":"second"}]'
+        assert json.loads(output) == dialogNodes
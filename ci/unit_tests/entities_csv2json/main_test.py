@@ -14,7 +14,7 @@ limitations under the License.
 """
 
 import entities_csv2json
-import os, json
+import os, json, multiprocessing
 from deepdiff import DeepDiff
 from ...test_utils import BaseTestCaseCapture
 
@@ -45,3 +45,49 @@ class TestMain(BaseTestCaseCapture):
             with open(expectedJsonPath, 'r') as expectedJsonFile, open(outputJsonPath, 'r') as outputJsonFile:
                 result = DeepDiff(json.load(expectedJsonFile), json.load(outputJsonFile), ignore_order=True).json
                 assert result == '{}'
+
+    @staticmethod
+    def createEntities(inputPath):
+        ''' Creates two directories with entity files, returns their paths'''
+        inputPaths = [os.path.join(inputPath, 'first'), os.path.join(inputPath, 'second')]
+        for dirPath, files in zip(inputPaths, [{'system_entities.csv': 'sys-number\nsys-date\nsys-number\n',
+                                                'product.csv': 'phone; mobile ;cell;mobile;phone\ntablet;pad\n'},
+                                               {'system_entities.csv': 'sys-date\nsys-time\n',
+                                                'product.csv': 'laptop;notebook\nipad;pad\n'}]):
+            BaseTestCaseCapture.createFolder(dirPath)
+            for fileName, content in files.items():
+                with open(os.path.join(dirPath, fileName), 'w') as entityFile:
+                    entityFile.write(content)
+        return inputPaths
+
+    def test_duplicates(self):
+        ''' Test for skipping of duplicated system entities and synonyms and reporting of values defined in several files'''
+        outputsPath = os.path.join(self.dataBasePath, 'outputs')
+        inputPaths = self.createEntities(os.path.join(outputsPath, 'duplicatesInput'))
+        params = ["-ie", inputPaths[0], "-ie", inputPaths[1], "-od", outputsPath, "-oe", "duplicates.json", "-j", "1"]
+
+        self.t_noExceptionAndLogMessage("Value or synonym 'pad' of entity 'product' from file '" + os.path.join(inputPaths[1], 'product.csv'), [params])
+        with open(os.path.join(outputsPath, "duplicates.json"), 'r') as outputJsonFile:
+            entitiesJSON = json.load(outputJsonFile)
+        assert [entityJSON['entity'] for entityJSON in entitiesJSON] == ['product', 'sys-number', 'sys-date', 'product', 'sys-time']
+        # synonyms are stripped, duplicates and the value are removed from them
+        assert entitiesJSON[0]['values'][0] == {'value': 'phone', 'synonyms': ['cell', 'mobile']}
+
+    def test_parallel(self):
+        ''' Test if entity files processed in parallel produce the same output as files processed sequentially'''
+        outputsPath = os.path.join(self.dataBasePath, 'outputs')
+        inputPaths = self.createEntities(os.path.join(outputsPath, 'parallelInput'))
+
+        outputs = []
+        startMethod = multiprocessing.get_start_method()
+        # the last run uses worker processes started by spawn (default on Windows and macOS)
+        for jobs, method in [('1', startMethod), ('2', startMethod), ('2', 'spawn')]:
+            params = ["-ie", inputPaths[0], "-ie", inputPaths[1], "-od", outputsPath, "-oe", "parallel" + jobs + method + ".json", "-j", jobs, "-v"]
+            multiprocessing.set_start_method(method, force=True)
+            try:
+                self.t_noException([params])
+            finally:
+                multiprocessing.set_start_method(startMethod, force=True)
+            with open(os.path.join(outputsPath, "parallel" + jobs + method + ".json"), 'r') as outputJsonFile:
+                outputs.append(outputJsonFile.read())
+        assert outputs[0] == outputs[1] == outputs[2]
@@ -0,0 +1,110 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import multiprocessing
+import os
+
+import intents_csv2json
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestMain(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        # create output folder
+        BaseTestCaseCapture.createFolder(TestMain.testOutputPath)
+
+    def callfunc(self, *args, **kwargs):
+        intents_csv2json.main(*args, **kwargs)
+
+    def createIntents(self, intentsDirPath):
+        BaseTestCaseCapture.createFolder(intentsDirPath)
+        for fileName, lines in [('HELLO.csv', ['hi', 'good morning # comment', 'Hi']),
+                                ('BUY.csv', ['I want to buy a <product>phone</product>', 'buy <product>tablet</product>']),
+                                ('BYE.csv', ['bye', 'see you'])]:
+            with open(os.path.join(intentsDirPath, fileName), 'w', encoding='utf8') as intentFile:
+                intentFile.write('\n'.join(lines) + '\n')
+
+    def getArgs(self, intentsDirPath, outputFileName, jobs):
+        return ['-ii', intentsDirPath, '-od', self.testOutputPath, '-oi', outputFileName, '-j', jobs]
+
+    def readOutput(self, outputFileName):
+        with open(os.path.join(self.testOutputPath, outputFileName), 'r', encoding='utf8') as outputFile:
+            return outputFile.read()
+
+    def test_mainParallel(self):
+        """Tests if intent files processed in parallel produce the same output as files processed sequentially."""
+        intentsDirPath = os.path.join(self.testOutputPath, 'parallelInput')
+        self.createIntents(intentsDirPath)
+
+        outputs = []
+        for jobs in ['1', '2']:
+            self.t_noException([self.getArgs(intentsDirPath, 'parallelResult' + jobs + '.json', jobs)])
+            outputs.append(self.readOutput('parallelResult' + jobs + '.json'))
+
+        assert outputs[0] == outputs[1]
+        intents = json.loads(outputs[0])
+        # intents are sorted by file name
+        assert [intent['intent'] for intent in intents] == ['BUY', 'BYE', 'HELLO']
+        # duplicate example is removed
+        assert [example['text'] for example in intents[2]['examples']] == ['hi', 'good morning']
+
+    def test_mainCache(self):
+        """Tests if intents of unchanged files are taken from the cache and changed files are processed again."""
+        intentsDirPath = os.path.join(self.testOutputPath, 'cacheInput')
+        cacheDirPath = os.path.join(self.testOutputPath, 'cache')
+        self.createIntents(intentsDirPath)
+        BaseTestCaseCapture.createFolder(cacheDirPath)
+        args = self.getArgs(intentsDirPath, 'cacheResult.json', '1') + ['-cd', cacheDirPath]
+
+        self.t_noException([args])
+        output = self.readOutput('cacheResult.json')
+        # one entry for each intent file
+        assert len(os.listdir(os.path.join(cacheDirPath, 'intents_csv2json'))) == 3
+
+        self.t_noException([args])
+        assert self.readOutput('cacheResult.json') == output
+
+        # changed file is processed again
+        with open(os.path.join(intentsDirPath, 'BYE.csv'), 'w', encoding='utf8') as intentFile:
+            intentFile.write('goodbye\n')
+        self.t_noException([args])
+        intents = json.loads(self.readOutput('cacheResult.json'))
+        assert [example['text'] for example in intents[1]['examples']] == ['goodbye']
+        assert len(os.listdir(os.path.join(cacheDirPath, 'intents_csv2json'))) == 4
+
+    def test_mainSpawn(self):
+        """Tests if intent files can be processed (and cached) by worker processes started by spawn (default on Windows and macOS)."""
+        intentsDirPath = os.path.join(self.testOutputPath, 'spawnInput')
+        cacheDirPath = os.path.join(self.testOutputPath, 'spawnCache')
+        self.createIntents(intentsDirPath)
+        args = self.getArgs(intentsDirPath, 'spawnResult.json', '2') + ['-cd', cacheDirPath]
+
+        startMethod = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        try:
+            self.t_noException([args])
+            output = self.readOutput('spawnResult.json')
+            self.t_noException([args])
+        finally:
+            multiprocessing.set_start_method(startMethod, force=True)
+        assert self.readOutput('spawnResult.json') == output
+        assert len(os.listdir(os.path.join(cacheDirPath, 'intents_csv2json'))) == 3
@@ -149,3 +149,26 @@ class TestProcessExample(BaseTestCaseCapture):
     def test_intentInvalidAnnotation(self):
         ''' Test for nested entities'''
         self.t_exitCodeAndLogMessage(1, 'Invalid annotation tag for the intent TestIntent, </in>', ['#Doing $some <tags> @ which ~ are <not> </in> </not> correct @what?', 'TestIntent', []])
+
+    def test_intentEntityWithRepeatedText(self):
+        ''' Test for location of the entity which text is also earlier in the example'''
+        expectedResult = {
+                "text": "red or red",
+                "mentions": [
+                    {
+                        "location": [
+                            7,
+                            10
+                        ],
+                        "entity": "color"
+                    }
+                ]
+            }
+        result = intents_csv2json.processExample('red or <color>red</color>', 'TestIntent', [])
+        assert result == expectedResult
+
+    def test_intentAlreadyExistingInSet(self):
+        ''' Test for duplicate example given by the set of example texts'''
+        result = intents_csv2json.processExample('<test>nothing</test> like the above', 'TestIntent', [], {"nothing like the above"})
+        assert result is None
+        assert 'Example used twice for the intent TestIntent, omitting: nothing like the above' in self.caplog.text
@@ -44,6 +44,10 @@ class DialogData(object):
         self._config = config           # we need config to get NAME_POLICY, verbosity,..
         self._NAME_POLICY = 'soft'      # TBD: enable to set the NamePolicy from config file
 
+        self._normalizedNames = {}  # key: (normalizing function, name), value: normalized name
+        # key: name, value: the lowest number which can make the name unique (separately for intents, entities and nodes)
+        self._nameModifiers = {'intents': {}, 'entities': {}, 'nodes': {}}
+
     #  LABEL
     #******************************************
 
@@ -106,8 +110,8 @@ class DialogData(object):
             if domain_name not in self._domains:
                 self._domains[domain_name] = []
             # make sure the nodeName is remembered within the domain
-            # if node_name not in self._nodes[domain_name]:
-            if node_name not in self._domains[domain_name]:
+            # (node which is not in _nodes yet cannot be in any domain, the list is searched only for existing nodes)
+            if node_name not in self._nodes or node_name not in self._domains[domain_name]:
                     self._domains[domain_name].append(node_name)
 
         # Update nodes structure, if node is not there yet - add it
@@ -160,19 +164,11 @@ class DialogData(object):
             intent_name is stripped from not allowed characters, spaces are replaced by _
             if the result exists a modifier is added at the end of the string
 
-            :returns unique intent_name or None if not able to create
+            :returns unique intent_name
         """
         #Normalize the string
-        unique_intent_name = toIntentName( self._NAME_POLICY, [['$special', '\\A']], intent_name)
-        if unique_intent_name not in self._intents:
-            return unique_intent_name
-        #try to modify by a number
-        for modifier in range(0, 10000):
-            new_unique_intent_name=unique_intent_name+repr(modifier)  #create a modified one
-            # Check if the name exists
-            if new_unique_intent_name not in self._intents:
-                return new_unique_intent_name
-        return None
+        unique_intent_name = self.__normalizeName(toIntentName, intent_name)
+        return self.__createUniqueName(self._intents, self._nameModifiers['intents'], unique_intent_name, '')
 
     def createUniqueEntityName(self, entity_name):
         """
@@ -180,19 +176,11 @@ class DialogData(object):
             intent_name is stripped from not allowed characters, spaces are replaced by _
             if the result exists a modifier is added at the end of the string
 
-            :returns unique entity_name or None if not able to create
+            :returns unique entity_name
         """
         #Normalize the string
-        unique_entity_name = toEntityName(self._NAME_POLICY, [['$special', '\\A']], entity_name)
-        if unique_entity_name not in self._entities:
-            return unique_entity_name
-        #try to modify by a number
-        for modifier in range(0, 10000):
-            new_unique_entity_name= unique_entity_name + repr(modifier)  #create a modified one
-            # Check if the name exists
-            if new_unique_entity_name not in self._entities:
-                return new_unique_entity_name
-        return None
+        unique_entity_name = self.__normalizeName(toEntityName, entity_name)
+        return self.__createUniqueName(self._entities, self._nameModifiers['entities'], unique_entity_name, '')
 
     def createUniqueNodeName(self, node_name):
         """
@@ -200,16 +188,28 @@ class DialogData(object):
             node_name is stripped from not allowed characters, spaces are replaced by _
             if the result exists a modifier is added at the end of the string
 
-            :return: unique node_name or None if not able to create
+            :return: unique node_name
         """
         # Normalize the string
-        unique_node_name = toIntentName(self._NAME_POLICY, [['$special', '\\A']], node_name).upper()
-        if unique_node_name not in self._nodes:
-            return unique_node_name
-        # try to modify by a number
-        for modifier in range(0, 10000):
-            new_unique_node_name = unique_node_name + '_' + repr(modifier)  # create a modified one
-            # Check if the name exists
-            if new_unique_node_name not in self._nodes:
-                return new_unique_node_name
-        return None
+        unique_node_name = self.__normalizeName(toIntentName, node_name).upper()
+        return self.__createUniqueName(self._nodes, self._nameModifiers['nodes'], unique_node_name, '_')
+
+    def __normalizeName(self, toName, name):
+        """ Returns name normalized by toName (toIntentName or toEntityName), normalized names are remembered """
+        key = (toName, name)
+        if key not in self._normalizedNames:
+            self._normalizedNames[key] = toName(self._NAME_POLICY, [['$special', '\\A']], name)
+        return self._normalizedNames[key]
+
+    def __createUniqueName(self, names, modifiers, name, separator):
+        """ Returns name if it is not in names, otherwise name + separator + the lowest number which makes it unique.
+            The lowest number tried last time is remembered for each name, all lower numbers are already used
+            (names are never removed), so the search continues from it.
+        """
+        if name not in names:
+            return name
+        modifier = modifiers.get(name, 0)
+        while name + separator + repr(modifier) in names:
+            modifier += 1
+        modifiers[name] = modifier
+        return name + separator + repr(modifier)
@@ -17,11 +17,15 @@ limitations under the License.
 class EntityData(object):
     """ Represents a single entity.    """
 
+    __slots__ = ('_values',)
+
     def __init__(self):
-        self._values = []         # list of all text alternatives of intent
+        self._values = None       # list of all text alternatives of intent
 
     def addValue(self, value):
+        if self._values is None:
+            self._values = []
         self._values.append(value)
 
     def getValues(self):
-        return self._values
+        return self._values if self._values is not None else []
@@ -17,11 +17,15 @@ limitations under the License.
 class IntentData(object):
     """ Represents a single intent.    """
 
+    __slots__ = ('_examples',)
+
     def __init__(self):
-        self._examples = []         # list of all text alternatives of intent
+        self._examples = None       # list of all text alternatives of intent
 
     def addExample(self, example):
+        if self._examples is None:
+            self._examples = []
         self._examples.append(example)
 
     def getExamples(self):
-        return self._examples
+        return self._examples if self._examples is not None else []
@@ -14,6 +14,7 @@ limitations under the License.
 """
 
 import re
+import sys
 from collections import OrderedDict
 
 from wawCommons import getScriptLogger
@@ -28,16 +29,22 @@ except NameError:
 
 class NodeData(object):
     """ Represents a data structure containing all necessary information for a single dialog node
+
+        There can be hundreds of thousands of nodes, so attributes are kept in slots and containers
+        are created only when the first item is added (most nodes have a single channel and no buttons).
     """
 
+    __slots__ = ('_channels', '_variables', '_jumptoTarget', '_jumptoSelector', '_rawOutputs', '_buttons', '_foldables',
+                 '_node_name', '_node_condition')
+
     def __init__(self):
-        self._channels = {}             # key: channel name, value: list of all outputs for the channel (channel corresponds to modality)
-        self._variables = {}            # key: variable name, value: variable value (request for changes on context)
+        self._channels = None           # key: channel name, value: list of all outputs for the channel (channel corresponds to modality)
+        self._variables = None          # key: variable name, value: variable value (request for changes on context)
         self._jumptoTarget = None
         self._jumptoSelector = None
-        self._rawOutputs = []           # list of all outputs from the right column of the Excel source
-        self._buttons = OrderedDict()   # key: button label, value: full button value, MUST BE ORDERED!
-        self._foldables = OrderedDict() # key: short text, value: long text
+        self._rawOutputs = None         # list of all outputs from the right column of the Excel source
+        self._buttons = None            # OrderedDict, key: button label, value: full button value, MUST BE ORDERED!
+        self._foldables = None          # OrderedDict, key: short text, value: long text
         self._node_name = ""            # Name of the node
         self._node_condition = ""       # text of the condition
 
@@ -54,18 +61,22 @@ class NodeData(object):
         return self._node_condition
 
     def addChannelOutput(self, channelName, channelOutput):
+        if self._channels is None:
+            self._channels = {}
         if channelName not in self._channels:
             self._channels[channelName] = []
         self._channels[channelName].append(channelOutput)
 
     def getChannelOutputs(self):
-        return self._channels
+        return self._channels if self._channels is not None else {}
 
     def addVariable(self, name, value):
-        self._variables[name] = value
+        if self._variables is None:
+            self._variables = {}
+        self._variables[sys.intern(name)] = value  # the same variables are set by many nodes
 
     def getVariables(self):
-        return self._variables
+        return self._variables if self._variables is not None else {}
 
     def setJumpTo(self, target, selector):
         target_name = target[1:] if target.startswith(u'#') else target
@@ -80,20 +91,26 @@ class NodeData(object):
         return self._jumptoSelector
 
     def addButton(self, label, value):
+        if self._buttons is None:
+            self._buttons = OrderedDict()
         self._buttons[label] = value
 
     def getButtons(self):
-        return self._buttons
+        return self._buttons if self._buttons is not None else OrderedDict()
 
     def addFoldable(self, _short_text, _long_text):
+        if self._foldables is None:
+            self._foldables = OrderedDict()
         self._foldables[_short_text] = _long_text
 
     def getFoldable(self):
-        return self._foldables
+        return self._foldables if self._foldables is not None else OrderedDict()
 
     def addRawOutput(self, rawOutputs, labelsMap):
         """ Read the raw output and store all data from it -
             channel outputs, context variables and jumpto definitions. """
+        if self._rawOutputs is None:
+            self._rawOutputs = []
         self._rawOutputs.append(rawOutputs)
         if not isinstance(rawOutputs, tuple) or sum([1 if x else 0 for x in rawOutputs]) == 0:
         # @marek-danel: This checks for an empty output. Changed from length to scan
@@ -34,19 +34,151 @@ limitations under the License.
    node_name - is derived from condition (unless we are using meta command to assign it)
        - they should be unique across all node names, if already exists - we ad _xxx where xxx is a unique number
 """
+import csv
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from xml.sax.saxutils import escape
 from zipfile import BadZipfile
 
 from openpyxl import load_workbook
 
 import DialogData as Dialog
+from cacheCommons import getCacheDirectory, hashFile, hashString, readCacheEntry, writeCacheEntry
 from DialogData import DialogData
-from wawCommons import getScriptLogger, toIntentName
+from wawCommons import (callWithLoggerConfig, getLoggerConfig, getScriptLogger,
+                        openFile, toIntentName)
 
 logger = getScriptLogger(__file__)
 
+NAME_POLICY = 'soft'        # TBD: enable to set the NamePolicy from config file
+
+CSV_EXTENSIONS = ('.csv', '.tsv')   # T2C sheets exported from Excel
+
+def readXLSXBlocks(filename, cacheDirectory=None):
+    """ Reads Excel spreadsheet (in T2C format) and splits it to blocks, returns list of tuples (domain, prefix, rawBlock).
+        Sheets exported to CSV or TSV are read by parseCSVBlocks (without openpyxl).
+        It does not touch any shared data so that spreadsheets can be read in parallel processes.
+        If cacheDirectory is given, blocks of the unchanged spreadsheet are taken from the cache (workbook is not loaded).
+    """
+    logger.info('Processing T2C file: %s', filename)
+    if not os.path.exists(filename):
+        logger.error('File does not exist: %s', filename)
+        return []
+    parseBlocks = parseCSVBlocks if filename.lower().endswith(CSV_EXTENSIONS) else parseXLSXBlocks
+    if not cacheDirectory:
+        return parseBlocks(filename)
+
+    # the entry of the file is replaced whenever the file (or this script) changes
+    cacheKey = hashString(os.path.abspath(filename), hashFile(os.path.abspath(__file__)))
+    fileStat = os.stat(filename)
+    entry = readCacheEntry(cacheDirectory, cacheKey)
+    if entry is not None and entry.get('size') == fileStat.st_size and entry.get('mtime') == fileStat.st_mtime:
+        # the same size and modification time, the file is not read at all
+        logger.info('T2C file %s not changed, reusing cached blocks', filename)
+        return getCachedBlocks(entry)
+
+    fileHash = hashFile(filename)
+    if entry is not None and entry.get('size') == fileStat.st_size and entry.get('hash') == fileHash:
+        # only modification time changed (e.g. the file was checked out again)
+        logger.info('T2C file %s not changed, reusing cached blocks', filename)
+        blocks = getCachedBlocks(entry)
+    else:
+        blocks = parseBlocks(filename)
+    writeCacheEntry(cacheDirectory, cacheKey, {'mtime': fileStat.st_mtime, 'size': fileStat.st_size, 'hash': fileHash, 'blocks': blocks})
+    return blocks
+
+def getCachedBlocks(entry):
+    """ Returns blocks stored in the cache entry (rows are stored as lists, domain and prefix are repeated in every block) """
+    return [(sys.intern(domain), sys.intern(prefix), [tuple(row) for row in block]) for domain, prefix, block in entry['blocks']]
+
+def parseXLSXBlocks(filename):
+    """ Loads Excel spreadsheet (in T2C format) and splits it to blocks, returns list of tuples (domain, prefix, rawBlock) """
+    blocks = []
+    # Derive domain name from file name (use the same naming policy as for intents)
+    try:
+        domainName = toIntentName(NAME_POLICY, None, os.path.splitext(os.path.split(filename)[1])[0])
+        try:
+            domainName = unicode(domainName, 'utf-8')  # Python 2
+        except NameError:
+            domainName = str(domainName)               # Python 3
+        workbook = load_workbook(filename=filename, read_only=True)
+    except (IOError, BadZipfile):
+        logger.error('File does not seem to be a valid Excel spreadsheet: %s', filename)
+        return blocks
+
+    # Process all the tabs of the file
+    for sheet in workbook.worksheets:
+        # get prefix is a sheet title
+        logger.info(' Sheet: %s', sheet.title)
+        try:
+            prefix = unicode(sheet.title, 'utf-8')  # Python 2
+        except NameError:
+            prefix = str(sheet.title)               # Python 3
+
+        splitRowsIntoBlocks(blocks, domainName, prefix, ([cell.value for cell in row] for row in sheet.iter_rows(max_col=4)))
+    return blocks
+
+def parseCSVBlocks(filename):
+    """ Reads a single T2C sheet exported to UTF-8 CSV (.csv) or TSV (.tsv) and splits it to blocks,
+        returns list of tuples (domain, prefix, rawBlock)
+
+        Name of the file is <domain>.<sheet>.csv (or <domain>.csv), so that all sheets of one workbook
+        are generated to the same dialog file. Only the first 4 columns are used, the same as in xlsx.
+    """
+    blocks = []
+    fileName = os.path.splitext(os.path.split(filename)[1])[0]
+    domainName, _, prefix = fileName.partition('.')
+    domainName = str(toIntentName(NAME_POLICY, None, domainName))
+    prefix = prefix or domainName
+    delimiter = '\t' if filename.lower().endswith('.tsv') else ','
+    try:
+        # utf-8-sig skips BOM written by Excel
+        with openFile(filename, 'r', encoding='utf-8-sig', newline='') as csvFile:
+            rows = ([value if value else None for value in row[:4]] + [None] * (4 - len(row)) for row in csv.reader(csvFile, delimiter=delimiter))
+            splitRowsIntoBlocks(blocks, domainName, prefix, rows)
+    except (IOError, UnicodeDecodeError, csv.Error) as e:
+        logger.error('File does not seem to be a valid UTF-8 CSV/TSV file: %s (%s)', filename, e)
+        return []
+    return blocks
+
+def splitRowsIntoBlocks(blocks, domainName, prefix, rows):
+    """ Separates all data blocks in the sheet (rows are lists of values of the first 4 columns) and appends them to blocks """
+    currentBlock = [] # Each cheet starts a new block
+    # Separate all data blocks in the sheet, if the currentBlock starts with header, the header is considered to be part of currentBlock
+    for row in rows:
+        validRow = False
+        # Check if the row is valid. Row is valid if it contains at least one column not empty and different from comment
+        for columnIndex in range (0, 4):
+            if row[columnIndex] and not (row[columnIndex].startswith('//')):
+                validRow = True
+        # Three slashes in the first cell cause whole rest of the line to be treated as comment
+        if row[0] and row[0].startswith('///'):
+            validRow = False
+
+        if not validRow:
+            # If behind the block, we save the currentBlock (if any was populated)
+            if currentBlock:
+                appendBlock(blocks, domainName, prefix, currentBlock)
+            currentBlock = []
+        else:
+            # if valid row - we add the raw to block
+            currentBlock.append((escape(row[0].strip()) if row[0] and not row[0].startswith('//') else None,
+                                 escape(row[1].strip()) if row[1] and not row[1].startswith('//') else None,
+                                 escape(row[2].strip()) if row[2] and not row[2].startswith('//') else None,
+                                 escape(row[3].strip()) if row[3] and not row[3].startswith('//') else None))
+    if currentBlock:
+        appendBlock(blocks, domainName, prefix, currentBlock)  # store the last block of the sheet
+
+def appendBlock(blocks, domain, prefix, block):
+    """ Add the block to the block list """
+    if not block or not block[0][0]:
+        logger.warning('First cell of the data block does not contain any data. (domain=%s, prefix=%s)', domain, prefix)
+        return
+    blocks.append((domain, prefix, block))
+
 class XLSXHandler(object):
     """ Converts Excel spreadsheet forom multiple fles to an internal data representation in DialogData.
     """
@@ -54,7 +186,8 @@ class XLSXHandler(object):
         self._blocks = []                 # internal representation of XLS, list of blocks, (block are the lines separated by empty line)
         self._dialogData = DialogData(config)   # internal representation of the workspace
         self._config= config              # we need config to get NAME_POLICY, verbosity,..
-        self._NAME_POLICY = 'soft'        # TBD: enable to set the NamePolicy from config file
+        self._NAME_POLICY = NAME_POLICY
+        self._cacheDirectory = getCacheDirectory(config, __file__)  # blocks of already parsed files (None if not used)
 
     def getBlocks(self):
         return self._blocks
@@ -71,64 +204,22 @@ class XLSXHandler(object):
             stores the data as tuples (domain, prefix, intent, rawBlock) in _dataBlocks,
             THIS IS THE FIRST PASS THROUGH INPUT  (a single file of the INPUT)
         """
-        logger.info('Processing xlsx file: %s', filename)
-        if not os.path.exists(filename):
-            logger.error('File does not exist: %s', filename)
-            return {}
+        self._blocks.extend(readXLSXBlocks(filename, self._cacheDirectory))
 
-        # Derive domain name from file name (use the same naming policy as for intents)
-        try:
-            domainName = toIntentName(self._NAME_POLICY, None, os.path.splitext(os.path.split(filename)[1])[0])
-            try:
-                domainName = unicode(domainName, 'utf-8')  # Python 2
-            except NameError:
-                domainName = str(domainName)               # Python 3
-            workbook = load_workbook(filename=filename, read_only=True)
-        except (IOError, BadZipfile):
-            logger.error('File does not seem to be a valid Excel spreadsheet: %s', filename)
-            return {}
-
-        # Process all the tabs of the file
-        for sheet in workbook.worksheets:
-            # get prefix is a sheet title
-            logger.info(' Sheet: %s', sheet.title)
-            try:
-                prefix = unicode(sheet.title, 'utf-8')  # Python 2
-            except NameError:
-                prefix = str(sheet.title)               # Python 3
-
-            currentBlock = [] # Each cheet starts a new block
-            # Separate all data blocks in the sheet, if the currentBlock starts with header, the header is considered to be part of currentBlock
-            for row in sheet.iter_rows(max_col=4):
-                validRow = False
-                # Check if the row is valid. Row is valid if it contains at least one column not empty and different from comment
-                for columnIndex in range (0, 4):
-                    if row[columnIndex] and row[columnIndex].value and not (row[columnIndex].value.startswith('//')):
-                        validRow = True
-                # Three slashes in the first cell cause whole rest of the line to be treated as comment
-                if row[0].value and row[0].value.startswith('///'):
-                    validRow = False
-
-                if not validRow:
-                    # If behind the block, we save the currentBlock (if any was populated)
-                    if currentBlock:
-                        self.__createBlock(domainName, prefix, currentBlock)
-                    currentBlock = []
-                else:
-                    # if valid row - we add the raw to block
-                    currentBlock.append((escape(row[0].value.strip()) if row[0].value and not row[0].value.startswith('//') else None,
-                                         escape(row[1].value.strip()) if row[1].value and not row[1].value.startswith('//') else None,
-                                         escape(row[2].value.strip()) if row[2].value and not row[2].value.startswith('//') else None,
-                                         escape(row[3].value.strip()) if row[3].value and not row[3].value.startswith('//') else None))
-            if currentBlock:
-                self.__createBlock(domainName, prefix, currentBlock)  # store the last block of the sheet
-
-    def __createBlock(self, domain, prefix, block):
-        """ Add the block to the block list """
-        if not block or not block[0][0]:
-            logger.warning('First cell of the data block does not contain any data. (domain=%s, prefix=%s)', domain, prefix)
-            return
-        self._blocks.append((domain, prefix, block))
+    def parseXLSXFilesIntoDataBlocks(self, filenames, jobs=1):
+        """ Reads all Excel spreadsheets by parseXLSXIntoDataBlocks, up to jobs files are read in parallel
+            (in separate processes). Blocks are stored in the order of files regardless of the order in which
+            the files were read.
+        """
+        if jobs > 1 and len(filenames) > 1:
+            # workers started by spawn need the logging configured as well (readXLSXBlocks logs verbose messages)
+            readBlocks = partial(callWithLoggerConfig, getLoggerConfig(), readXLSXBlocks)
+            with ProcessPoolExecutor(max_workers=min(jobs, len(filenames))) as executor:
+                for blocks in executor.map(readBlocks, filenames, [self._cacheDirectory] * len(filenames)):
+                    self._blocks.extend(blocks)
+        else:
+            for filename in filenames:
+                self.parseXLSXIntoDataBlocks(filename)
 
     def __is_condition_block(self, block):
         """ :return: true if first cell contains X_PLACEHOLDER
@@ -32,6 +32,32 @@ class XMLHandler(object):
     def convertDialogData(self, dialogData, nodes):
         """ Converts Dialog Data of a single domain into XML and returns pointer to the root XML element. """
         nodesXml = XML.Element('nodes')
+        for nodeXml in self._convertNodes(dialogData, nodes):
+            nodesXml.append(nodeXml)
+        return nodesXml
+
+    def writeDialogData(self, dialogData, nodes, outputFile):
+        """ Converts Dialog Data of a single domain into XML and writes it to the binary file (in UTF-8).
+            Nodes are written one by one as they are converted, the whole XML is never kept in memory.
+            The output is the same as printXml of convertDialogData.
+        """
+        with XML.xmlfile(outputFile, encoding='utf-8') as xmlFile:
+            nodesXml = self._convertNodes(dialogData, nodes)
+            nodeXml = next(nodesXml, None)
+            if nodeXml is None:
+                xmlFile.write(XML.Element('nodes'))
+            else:
+                with xmlFile.element('nodes'):
+                    while nodeXml is not None:
+                        # the same indentation as pretty printed nodes element
+                        XML.indent(nodeXml, space='  ', level=1)
+                        xmlFile.write('\n  ', nodeXml)
+                        nodeXml = next(nodesXml, None)
+                    xmlFile.write('\n')
+        outputFile.write(b'\n')
+
+    def _convertNodes(self, dialogData, nodes):
+        """ Yields XML element of each node of the domain """
         for node_name in nodes: #for each node in the domain
             nodeData = dialogData.getNode(node_name)
             if nodeData == None:
@@ -50,8 +76,7 @@ class XMLHandler(object):
                 nodeXml.append(self._createContextElement(nodeData.getVariables()))
             if nodeData.getJumpToTarget() and nodeData.getJumpToSelector():
                 nodeXml.append(self._createGotoElement(nodeData.getJumpToTarget(), nodeData.getJumpToSelector()))
-            nodesXml.append(nodeXml)
-        return nodesXml
+            yield nodeXml
 
     def printXml(self, xmlDocument, prettyPrint=True):
         """ Converts xmlDocument to string. """
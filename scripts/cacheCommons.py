@@ -0,0 +1,170 @@
+"""
+Copyright 2018 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+
+from wawCommons import getScriptLogger, openFile
+
+logger = getScriptLogger(__file__)
+
+HASH_BLOCK_SIZE = 65536
+
+
+def hashFile(filePath):
+    """Returns sha256 hex digest of the content of the file"""
+    sha = hashlib.sha256()
+    with open(filePath, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def hashString(*values):
+    """Returns sha256 hex digest of all the values (converted to strings)"""
+    sha = hashlib.sha256()
+    for value in values:
+        sha.update(str(value).encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+def getCacheDirectory(config, scriptName):
+    """Returns cache directory of the script or None if caching is not switched on (common_cache_directory not set)
+
+    Every script has its own subdirectory of common_cache_directory (named after the script) so that
+    one cache directory can be shared by the whole build.
+    """
+    if not getattr(config, 'common_cache_directory', None):
+        return None
+    return os.path.join(getattr(config, 'common_cache_directory'), os.path.splitext(os.path.basename(scriptName))[0])
+
+def filesUnchanged(fileHashes):
+    """Checks that all the files (dictionary path -> hash) still exist and have the same content"""
+    for filePath, fileHash in fileHashes.items():
+        if not os.path.isfile(filePath) or hashFile(filePath) != fileHash:
+            logger.verbose("Cached file %s changed", filePath)
+            return False
+    return True
+
+def readCacheEntry(cacheDirectory, key):
+    """Returns JSON content of the cache entry or None if there is no entry (or it cannot be read)"""
+    entryPath = os.path.join(cacheDirectory, key + '.json')
+    if not os.path.isfile(entryPath):
+        return None
+    try:
+        with openFile(entryPath, 'r') as entryFile:
+            return json.load(entryFile)
+    except (IOError, ValueError) as e:
+        logger.warning("Ignoring corrupted cache entry %s: %s", entryPath, e)
+        return None
+
+def writeCacheEntry(cacheDirectory, key, content):
+    """Stores JSON content as a cache entry
+
+    Entry is written to a temporary file first and then renamed, so concurrent builds
+    never see a partially written entry.
+    """
+    if not os.path.exists(cacheDirectory):
+        os.makedirs(cacheDirectory, exist_ok=True)
+    entryPath = os.path.join(cacheDirectory, key + '.json')
+    fd, tmpPath = tempfile.mkstemp(dir=cacheDirectory, suffix='.tmp')
+    try:
+        with openFile(fd, 'w') as entryFile:
+            json.dump(content, entryFile, ensure_ascii=False)
+        os.replace(tmpPath, entryPath)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+    logger.verbose("Cache entry %s written", entryPath)
+
+def getFileMode(filePath):
+    """Returns permission bits of the file, or of a new file created by open (0o666 without umask) if it does not exist
+
+    Temporary files created by tempfile.mkstemp are readable only by the owner, they get this mode before
+    they replace the file.
+    """
+    if os.path.exists(filePath):
+        return stat.S_IMODE(os.stat(filePath).st_mode)
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def writeFileIfChanged(filePath, content):
+    """Writes text content to the file unless the file already has the same content, returns sha256 hex digest of the written file
+
+    Unchanged file is not touched at all (its modification time is kept), so tools comparing modification times
+    or hashes see it as unchanged. Changed file is written to a temporary file first and then renamed, it keeps
+    permissions of the replaced file. Line ends are translated to os.linesep as in files opened in text mode,
+    the returned hash is the same as hashFile of the written file.
+    """
+    if os.linesep != '\n':
+        content = content.replace('\n', os.linesep)
+    contentHash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    if os.path.isfile(filePath):
+        with openFile(filePath, 'r', newline='') as existingFile:
+            if existingFile.read() == content:
+                logger.verbose("File %s not changed", filePath)
+                return contentHash
+    directory = os.path.dirname(os.path.abspath(filePath))
+    fd, tmpPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with openFile(fd, 'w', newline='') as tmpFile:
+            tmpFile.write(content)
+        os.chmod(tmpPath, getFileMode(filePath))
+        os.replace(tmpPath, filePath)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+    logger.verbose("File %s written", filePath)
+    return contentHash
+
+class LinesepWriter(object):
+    """Binary file wrapper translating newlines of the written bytes to os.linesep as text mode files do"""
+
+    def __init__(self, binaryFile):
+        self._binaryFile = binaryFile
+        self._linesep = os.linesep.encode('ascii')
+
+    def write(self, data):
+        return self._binaryFile.write(bytes(data).replace(b'\n', self._linesep))
+
+def writeStreamIfChanged(filePath, write):
+    """Same as writeFileIfChanged, but the (UTF-8 encoded) content is written by write(binaryFile) to a temporary file
+
+    The content is never kept in memory as a whole. The temporary file replaces the file only if their content differs.
+    Line ends written to binaryFile are translated to os.linesep as well.
+    """
+    directory = os.path.dirname(os.path.abspath(filePath))
+    fd, tmpPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmpFile:
+            write(tmpFile if os.linesep == '\n' else LinesepWriter(tmpFile))
+        contentHash = hashFile(tmpPath)
+        if os.path.isfile(filePath) and os.path.getsize(filePath) == os.path.getsize(tmpPath) and hashFile(filePath) == contentHash:
+            os.remove(tmpPath)
+            logger.verbose("File %s not changed", filePath)
+        else:
+            os.chmod(tmpPath, getFileMode(filePath))
+            os.replace(tmpPath, filePath)
+            logger.verbose("File %s written", filePath)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+    return contentHash
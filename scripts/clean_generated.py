@@ -31,6 +31,7 @@ def main(argv):
     parser.add_argument('-od', '--common_outputs_directory', required=False, help='directory where the otputs will be stored (outputs is default)')
     parser.add_argument('-oi', '--common_outputs_intents', help='file with output json with all the intents')
     parser.add_argument('-oe', '--common_outputs_entities', help='file with output json with all the entities')
+    parser.add_argument('-gm', '--common_generated_manifest', required=False, help='manifest of generated files (generated files are not removed if it is used)')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('-s', '--common_soft', required=False, help='soft name policy - change intents and entities names without error.', action='store_true', default="")
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
@@ -43,22 +44,27 @@ def main(argv):
     
     logger.info('STARTING: ' + os.path.basename(__file__))
 
-    if os.path.exists(config.common_generated_dialogs[0]):
-        shutil.rmtree(config.common_generated_dialogs[0])
-        logger.verbose('%s does not exist.', config.common_generated_dialogs[0])
+    # with the manifest of generated files, dialog_xls2xml updates generated files (and removes files which are not
+    # generated anymore) itself, they are kept so that unchanged files keep their modification times
+    if getattr(config, 'common_generated_manifest', None):
+        logger.verbose('Generated files are kept (manifest %s is used).', getattr(config, 'common_generated_manifest'))
     else:
-        logger.verbose('%s does not exist.', config.common_generated_dialogs[0])
+        if os.path.exists(config.common_generated_dialogs[0]):
+            shutil.rmtree(config.common_generated_dialogs[0])
+            logger.verbose('%s does not exist.', config.common_generated_dialogs[0])
+        else:
+            logger.verbose('%s does not exist.', config.common_generated_dialogs[0])
 
-    if os.path.exists(config.common_generated_intents[0]):
-        shutil.rmtree(config.common_generated_intents[0])
-        logger.verbose('%s does not exist.', config.common_generated_intents[0])
-    else:
-        logger.verbose('%s doess not exist.', config.common_generated_intents[0])
-    if os.path.exists(config.common_generated_entities[0]):
-        shutil.rmtree(config.common_generated_entities[0])
-        logger.verbose('%s does not exist.', config.common_generated_entities[0])
-    else:
-        logger.verbose('Does not exist.')
+        if os.path.exists(config.common_generated_intents[0]):
+            shutil.rmtree(config.common_generated_intents[0])
+            logger.verbose('%s does not exist.', config.common_generated_intents[0])
+        else:
+            logger.verbose('%s doess not exist.', config.common_generated_intents[0])
+        if os.path.exists(config.common_generated_entities[0]):
+            shutil.rmtree(config.common_generated_entities[0])
+            logger.verbose('%s does not exist.', config.common_generated_entities[0])
+        else:
+            logger.verbose('Does not exist.')
     if os.path.exists(config.common_outputs_directory):
         shutil.rmtree(config.common_outputs_directory)
         logger.verbose('%s has been removed.', config.common_outputs_directory)
@@ -18,6 +18,7 @@ import json
 import logging
 import os
 import sys
+from collections import deque
 
 import lxml.etree as LET
 
@@ -36,32 +37,45 @@ def convertDialog(dialogNodesJSON):
     dialogXML = LET.Element("nodes", nsmap=NSMAP)
 
     #print dialogNodesJSON
-    # find root
-    rootJSON = findNode(dialogNodesJSON, None, None)
-    expandNode(dialogNodesJSON, dialogXML, rootJSON)
+    nodesIndex = indexNodes(dialogNodesJSON)
+    expandNodes(nodesIndex, dialogXML)
+    # keep only unprocessed nodes (in the original order)
+    unprocessed = set(id(nodeJSON) for nodesJSON in nodesIndex.values() for nodeJSON in nodesJSON)
+    dialogNodesJSON[:] = [nodeJSON for nodeJSON in dialogNodesJSON if id(nodeJSON) in unprocessed]
     if (len(dialogNodesJSON) > 0):
         logger.error("There are " + str(len(dialogNodesJSON)) + " unprocessed nodes: " + str(dialogNodesJSON))
     return dialogXML
 
-# dialogNodesJSON: rest of nodes to process
-# upperNodeXML: where to append siblings
-# nodeJSON: node to expand
-# Converts this node and recursively all its children and siblings
-def expandNode(dialogNodesJSON, upperNodeXML, nodeJSON):
-    nodeXML = convertNode(nodeJSON)
-    upperNodeXML.append(nodeXML)
-
-    # find first child
-    childJSON = findNode(dialogNodesJSON, nodeJSON['dialog_node'], None) # expanded node as parent, None as sibling
-    if childJSON is not None:
-        childrenXML = LET.Element('nodes') # create 'nodes' tag
-        nodeXML.append(childrenXML)
-        expandNode(dialogNodesJSON, childrenXML, childJSON) # expand first child (process its siblings and children)
-
-    # find next sibling
-    siblingJSON = findNode(dialogNodesJSON, nodeJSON['parent'] if 'parent' in nodeJSON else None, nodeJSON['dialog_node'])
-    if siblingJSON is not None:
-        expandNode(dialogNodesJSON, upperNodeXML, siblingJSON) # expand next sibling (process its siblings and children)
+# dialogNodesJSON: list of all nodes
+# Returns dictionary (parent, previous sibling) -> nodes with that parent and previous sibling (in the original order)
+def indexNodes(dialogNodesJSON):
+    nodesIndex = {}
+    for nodeJSON in dialogNodesJSON:
+        nodesIndex.setdefault((getValue(nodeJSON, 'parent'), getValue(nodeJSON, 'previous_sibling')), deque()).append(nodeJSON)
+    return nodesIndex
+
+# nodesIndex: index of nodes to process (see indexNodes)
+# dialogXML: where to append root nodes
+# Converts root node and all its children and siblings (each node is followed by its children, then by its next sibling)
+def expandNodes(nodesIndex, dialogXML):
+    # stack of nodes to find: (where to append the node, parent name, previous sibling name, whether it is first child)
+    stack = [(dialogXML, None, None, False)]
+    while stack:
+        upperNodeXML, parentName, siblingName, firstChild = stack.pop()
+        nodeJSON = findNode(nodesIndex, parentName, siblingName)
+        if nodeJSON is None:
+            continue
+        if firstChild:
+            childrenXML = LET.Element('nodes') # create 'nodes' tag
+            upperNodeXML.append(childrenXML)
+            upperNodeXML = childrenXML
+        nodeXML = convertNode(nodeJSON)
+        upperNodeXML.append(nodeXML)
+
+        # next sibling is processed after all the children
+        stack.append((upperNodeXML, parentName, nodeJSON['dialog_node'], False))
+        # first child (expanded node as parent, None as sibling)
+        stack.append((nodeXML, nodeJSON['dialog_node'], None, True))
 
 def convertNode(nodeJSON):
     nodeXML = LET.Element('node')
@@ -332,13 +346,12 @@ def convertAll(upperNodeXML, nodeJSON, keyJSON, nameXML = None):
         logger.error("Unknown value type")
 
 # find and return node with specific parent and previous sibling
-# removing it from the list
-def findNode(dialogNodesJSON, parentName, siblingName):
-    for nodeJSON in dialogNodesJSON:
-        if getValue(nodeJSON, 'parent') == parentName and getValue(nodeJSON, 'previous_sibling') == siblingName:
-            dialogNodesJSON.remove(nodeJSON)
-            return nodeJSON
-    return None
+# removing it from the index
+def findNode(nodesIndex, parentName, siblingName):
+    nodesJSON = nodesIndex.get((parentName, siblingName))
+    if not nodesJSON:
+        return None
+    return nodesJSON.popleft()
 
 def getValue(dict, key):
     if key in dict:
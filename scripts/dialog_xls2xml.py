@@ -15,18 +15,22 @@ limitations under the License.
 
 # coding: utf-8
 import argparse
+import json
 import logging
 import os
 import sys
 
+from cacheCommons import hashFile, writeFileIfChanged, writeStreamIfChanged
 from cfgCommons import Cfg
 from wawCommons import getScriptLogger, openFile, setLoggerConfig
-from XLSXHandler import XLSXHandler
+from XLSXHandler import CSV_EXTENSIONS, XLSXHandler
 from XMLHandler import XMLHandler
 
 logger = getScriptLogger(__file__)
 
 def saveDialogDataToFileSystem(dialogData, handler, config):
+    # all generated files are written only if their content changed, key: file path, value: hash of the content
+    generatedFiles = {}
     # Create directory for dialogs (if it does not exist already)
     if hasattr(config, 'common_generated_dialogs') and not os.path.exists(getattr(config, 'common_generated_dialogs')):
         os.makedirs(getattr(config, 'common_generated_dialogs'))
@@ -35,9 +39,8 @@ def saveDialogDataToFileSystem(dialogData, handler, config):
     domains = dialogData.getAllDomains()
     for domain_name in domains:   # For all domains
         filename = getattr(config, 'common_generated_dialogs') + '/' + domain_name + '.xml'
-        with openFile(filename, 'w', encoding='utf8') as dialogFile:
-            xmlData = handler.convertDialogData(dialogData, domains[domain_name]) #process all nodes of the domain
-            dialogFile.write(handler.printXml(xmlData))
+        # nodes of the domain are written as they are converted
+        generatedFiles[filename] = writeStreamIfChanged(filename, lambda dialogFile: handler.writeDialogData(dialogData, domains[domain_name], dialogFile))
 
     # generate intents if 'common_generated_intents' folder is specified
     if hasattr(config, 'common_generated_intents'):
@@ -51,10 +54,8 @@ def saveDialogDataToFileSystem(dialogData, handler, config):
         for intent, intentData in dialogData.getAllIntents().items():
             if len(intentData.getExamples()) > 0:
                 intent_name = intent[1:] if intent.startswith(u'#') else intent
-
-                with openFile(os.path.join(generatedIntentsFolder, intent_name + '.csv'), 'w') as intentFile:
-                    for example in intentData.getExamples():
-                        intentFile.write(example + '\n')
+                filename = os.path.join(generatedIntentsFolder, intent_name + '.csv')
+                generatedFiles[filename] = writeFileIfChanged(filename, ''.join(example + '\n' for example in intentData.getExamples()))
 
     # generate entities if 'common_generated_entities' folder is specified
     if hasattr(config, 'common_generated_entities'):
@@ -66,19 +67,52 @@ def saveDialogDataToFileSystem(dialogData, handler, config):
             logger.info('Created new directory ' + generatedEntitiesFolder )
         # One file per entity
         for entity_name, entityData in dialogData.getAllEntities().items():
-            with openFile(os.path.join(generatedEntitiesFolder, entity_name + '.csv'), 'w') as entityFile:
-                for entityList in entityData.getValues():
-                    entityFile.write(entityList + '\n')
+            filename = os.path.join(generatedEntitiesFolder, entity_name + '.csv')
+            generatedFiles[filename] = writeFileIfChanged(filename, ''.join(entityList + '\n' for entityList in entityData.getValues()))
+
+    if getattr(config, 'common_generated_manifest', None):
+        updateManifest(getattr(config, 'common_generated_manifest'), generatedFiles)
+
+def updateManifest(manifestPath, generatedFiles):
+    """Removes files generated by the previous run which were not generated now and writes the new manifest
+
+    Manifest is a JSON file with hashes of the content of all generated files (key: file path relative to the manifest,
+    value: sha256). Files changed since the previous run (not by this script) are not removed.
+    """
+    manifestDirectory = os.path.dirname(os.path.abspath(manifestPath))
+    generatedFiles = {os.path.relpath(os.path.abspath(filename), manifestDirectory).replace(os.sep, '/'): fileHash
+                      for filename, fileHash in generatedFiles.items()}
+    previousFiles = {}
+    if os.path.isfile(manifestPath):
+        try:
+            with openFile(manifestPath, 'r') as manifestFile:
+                previousFiles = json.load(manifestFile).get('files', {})
+        except ValueError as e:
+            logger.warning('Ignoring corrupted manifest %s: %s', manifestPath, e)
+    for filename, fileHash in previousFiles.items():
+        filePath = os.path.join(manifestDirectory, *filename.split('/'))
+        if filename not in generatedFiles and os.path.isfile(filePath):
+            if hashFile(filePath) == fileHash:
+                os.remove(filePath)
+                logger.info('Removed file %s, it is not generated anymore', filePath)
+            else:
+                logger.warning('File %s is not generated anymore but it was changed, it is not removed', filePath)
+    if not os.path.exists(manifestDirectory):
+        os.makedirs(manifestDirectory)
+    writeFileIfChanged(manifestPath, json.dumps({'files': generatedFiles}, indent=4, sort_keys=True, ensure_ascii=False) + '\n')
 
 def main(argv):
     parser = argparse.ArgumentParser(description='Creates dialog nodes with answers to intents .', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # optional arguments
-    parser.add_argument('-x', '--common_xls', required=False, help='file with MSExcel formated dialog', action='append')
+    parser.add_argument('-x', '--common_xls', required=False, help='file with MSExcel formated dialog (or its sheet exported to UTF-8 .csv or .tsv) or folder with such files', action='append')
     parser.add_argument('-gd', '--common_generated_dialogs', nargs='?', help='generated dialog file')
     parser.add_argument('-gi', '--common_generated_intents', nargs='?', help='directory for generated intents')
     parser.add_argument('-ge', '--common_generated_entities', nargs='?', help='directory for generated entities')
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
     parser.add_argument('-oc', '--common_output_config', help='output configuration file')
+    parser.add_argument('-gm', '--common_generated_manifest', required=False, help='file with hashes of all generated files, files generated by the previous run and not generated now are removed')
+    parser.add_argument('-cd', '--common_cache_directory', required=False, help='directory with the cache of parsed xlsx files, unchanged files are not parsed again')
+    parser.add_argument('-j', '--common_jobs', required=False, help='number of processes parsing xlsx files in parallel (number of CPUs is the default)')
     parser.add_argument('-v', '--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
@@ -103,20 +137,25 @@ def main(argv):
     xlsxHandler = XLSXHandler(config)
 
     logger.info(getattr(config, 'common_xls'))
+    xlsFiles = []
     for fileOrFolder in getattr(config, 'common_xls'):
         logger.verbose('Searching in path: %s', fileOrFolder)
         if os.path.isdir(fileOrFolder):
             xlsDirList = os.listdir(fileOrFolder)
             for xlsFile in xlsDirList:
-                if os.path.isfile(os.path.join(fileOrFolder, xlsFile)) and xlsFile.endswith('.xlsx') and \
+                if os.path.isfile(os.path.join(fileOrFolder, xlsFile)) and xlsFile.endswith(('.xlsx',) + CSV_EXTENSIONS) and \
                         not(xlsFile.startswith('~')) and not(xlsFile.startswith('.')):
-                    xlsxHandler.parseXLSXIntoDataBlocks(fileOrFolder + "/" + xlsFile)
+                    xlsFiles.append(fileOrFolder + "/" + xlsFile)
                 else:
                     logger.warning('The file %s skipped due to failing file selection policy check. '
-                            'It should be .xlsx file not starting with ~ or .(dot).', os.path.join(fileOrFolder, xlsFile))
+                            'It should be .xlsx (or .csv, .tsv) file not starting with ~ or .(dot).', os.path.join(fileOrFolder, xlsFile))
 
         elif os.path.exists(fileOrFolder):
-            xlsxHandler.parseXLSXIntoDataBlocks(fileOrFolder)
+            xlsFiles.append(fileOrFolder)
+
+    # workbooks are parsed in parallel processes, their blocks are merged in the order of xlsFiles
+    jobs = int(getattr(config, 'common_jobs', 0) or 0) or os.cpu_count() or 1
+    xlsxHandler.parseXLSXFilesIntoDataBlocks(xlsFiles, jobs)
 
     xlsxHandler.convertBlocksToDialogData() # Blocks-> DialogData
     xlsxHandler.updateReferences()          # Resolving cross references
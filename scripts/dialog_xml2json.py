@@ -13,20 +13,27 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import argparse
+import cProfile
 import copy
 import datetime
+import hashlib
 import io
 import json
 import logging
 import os
 import re
 import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from xml.sax.saxutils import unescape
 
 import lxml.etree as LET
 
+from cacheCommons import getCacheDirectory, filesUnchanged, hashFile, hashString, readCacheEntry, writeCacheEntry
 from cfgCommons import Cfg
-from wawCommons import getRequiredParameter, getOptionalParameter, getScriptLogger, setLoggerConfig
+from profileCommons import Profiler
+from wawCommons import getRequiredParameter, getOptionalParameter, getScriptLogger, isVerbose, setLoggerConfig
 
 logger = getScriptLogger(__file__)
 
@@ -134,39 +141,26 @@ DEFAULT_GENERIC.set('propagate','true')
 # on
 DEFAULT_GENERIC.set('on','false')
 
-# GLOBAL VARIABLES
-counter = 0
-firstNode = True
-parent_map = {}
-rootGlobal = None
-schema = None
-
-def replace_config_variables (importTree):
-     global config
-     replaces = importTree.xpath('//replace')
-
-     for repl in replaces:
-         # repl.text  - name of the variable to be replaced
-         # getattr(config, repl.text) - value of replacement
-         # whole segment <replace>...</replace>
-         if repl.text=='internal_build_date_time':
-             middle= unicode(datetime.datetime.now().strftime("%y-%m-%d-%H-%M"))
-         else:
-            middle=getattr(config, repl.text) if hasattr(config, repl.text) else ""
-         repl.getparent().text = ("" if repl.getparent().text is None else repl.getparent().text) + middle + ("" if repl.tail is None else repl.tail)
-         repl.getparent().remove(repl)
-
-def validate(xml, filePath, imported):
-    importedStr = "imported" if imported else "root"
-    global schema
-    try:
-        schema.assertValid(xml)
-        logger.verbose("%s XML %s is valid", importedStr, filePath)
-    except LET.DocumentInvalid as e:
-        logger.critical("Invalid %s XML: %s", importedStr, filePath)
-        logger.critical(e)
-        exit(1)
+# Node names can only contain letters, numbers, hyphens and underscores
+NODE_NAME_PATTERN = re.compile("[\\w-]+", re.UNICODE)
+
+# XML namespaces
+XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+XSI = "{%s}" % XSI_NAMESPACE
+NSMAP = {"xsi" : XSI_NAMESPACE}
+
+def getChildElements(element):
+    """Returns dictionary tag -> first child element with that tag"""
+    elements = {}
+    for child in element:
+        if child.tag not in elements:
+            elements[child.tag] = child
+    return elements
 
+def getRootScope(filePath):
+    """Returns scope of the root element of the XML file (only the beginning of the file is parsed)"""
+    for _, element in LET.iterparse(filePath, events=('start',)):
+        return element.get('scope')
 
 def getNodeWithTheSameCondition(root, testNode):
     testNodeCondition = testNode.find('condition').text if testNode.find('condition') is not None else 'anything_else'
@@ -175,145 +169,6 @@ def getNodeWithTheSameCondition(root, testNode):
         if testNodeCondition == nodeCondition:
             return node
 
-def importText(importTree, config):
-    imports = importTree.xpath('//importText')
-    for imp in imports:
-        filename = imp.text.split('/')
-        logger.verbose('Importing %s', os.path.join(os.path.dirname(getRequiredParameter(config, 'common_dialog_main')), *filename))
-        fp = io.open(os.path.join(os.path.dirname(getRequiredParameter(config, 'common_dialog_main')),*filename) ,'r', encoding='utf-8')
-        importTxt = fp.read()
-        fp.close()
-        imp.getparent().text = ("" if imp.getparent().text is None else imp.getparent().text) + importTxt + ("" if imp.tail is None else imp.tail)
-        imp.getparent().remove(imp)
-
-def importNodes(root, config):
-    global rootGlobal, names
-    # IMPORT AND APPEND NODES
-    defaultNode = None
-    if len(root) > 0 and (root[len(root)-1].find('condition') is None or (root[len(root)-1].find('condition') is not None and root[len(root)-1].find('condition').text == 'anything_else')):
-        # IF LAST NODE DOES NOT HAVE CONDITION OR HAS CONDITION SET TO 'anything_else'
-        defaultNode = root[len(root)-1]
-
-    for node in root.findall('import'):
-        logger.verbose('Importing %s', os.path.join(os.path.dirname(getattr(config, 'common_dialog_main')), node.text))
-        importPathSplit = node.text.split('/')
-        importPath = os.path.join(os.path.dirname(getattr(config, 'common_dialog_main')), *importPathSplit)
-        if not os.path.exists(importPath):
-            logger.critical('Imported dialog file %s not found.', importPath)
-            exit(1)
-        importTree = LET.parse(importPath)
-        importText(importTree, config)
-        replace_config_variables(importTree)
-
-        if schema is not None:
-            validate(importTree, importPath[0], True)
-
-        importRoot = importTree.getroot()
-        childIndex = 1
-        for importChild in importRoot.findall('node'):
-            #logger.info('  Importing node: %s', importChild)
-            """
-            nodeWithTheSameCondition = getNodeWithTheSameCondition(root, importChild)
-            if nodeWithTheSameCondition is not None:
-                # SKIP NODES WITH SAME CONDITIONS
-                #logger.info('    Skipping node (same condition): %s', nodeWithTheSameCondition)
-                if importChild.find('context') is not None:
-                    #logger.info('      Context found for node: %s', importChild)
-                    if nodeWithTheSameCondition.find('context') is None:
-                        #logger.info('      Creating context for node: %s', nodeWithTheSameCondition)
-                        nodeWithTheSameConditionContext = LET.Element('context')
-                        nodeWithTheSameCondition.append(nodeWithTheSameConditionContext)
-                    # COPY ALL CONTEXT TO NODE WITH SAME CONDITION
-                    for context in importChild.find('context'):
-                        #logger.info('      Appending context: %s', context)
-                        nodeWithTheSameCondition.find('context').append(context)
-            else:
-                # INSERT NODE
-
-                #logger.info('    Appending node: %s', importChild)
-            """
-            root.insert(root.index(node) + childIndex, importChild)
-            childIndex += 1
-
-
-    if defaultNode is not None:
-        # MOVE DEFAULT_NODE TO THE END
-        root.remove(defaultNode)
-        root.append(defaultNode)
-
-    # PROCESS CHILD NODES
-    for node in root.findall('node'):
-        children = node.find('nodes')
-        if children is not None:
-            importNodes(children, config)
-
-def removeAllComments(tree):
-    comments = tree.xpath('//comment()')
-    for c in comments:
-        p = c.getparent()
-        p.remove(c)
-
-def removeOutOfScopeNodes(tree):
-    scopedNodes = tree.xpath('//*[@scope]')
-    for scopedNode in scopedNodes:
-        if not inScope(scopedNode):
-            p = scopedNode.getparent()
-            p.remove(scopedNode)
-
-def inScope(node):
-    if not hasattr(config, 'common_scope'):
-        return False # no scope specified -> remove all scoped nodes
-    scope = getattr(config, 'common_scope')
-    if scope == node.get('scope'):
-        return True
-    else:
-        return False
-
-# When duplicit node is found, exit with error
-def findAllNodeNames(tree):
-    names = []
-    nodesWithNames = tree.xpath('//node[@name]')
-    for nodeWithName in nodesWithNames:
-        if nodeWithName.get('name') in names:
-            logger.error("Duplicit node name found: '%s'", nodeWithName.get('name'))
-            exit(1)
-        else:
-            names.append(nodeWithName.get('name'))
-    return names
-
-# creates name tag for given node using its 'name' attribute, if there is one,
-# otherwise generates first unique combination of 'node_' + number.
-def generateNodeName(node, prefix):
-    global counter, names
-    name = node.find('name')
-    if name is None:
-        if 'name' in node.attrib:
-            nodeName = LET.Element('name')
-            nodeName.text = node.get('name')
-            node.append(nodeName)
-        else:
-            while ("node_" + str(counter) in names):
-                counter += 1
-            nodeName = LET.Element('name')
-            nodeName.text = "node_" + str(counter)
-            node.append(nodeName)
-            counter += 1
-#        logger.error('Generate node name: %s', nodeName.text)
-    if prefix:
-        node.find('name').text = prefix + node.find('name').text
-    validateNodeName(node)
-
-def validateNodeName(node):
-    global names
-    name = node.find('name').text
-    # check characters (Node names can only contain letters, numbers, hyphens and underscores)
-    pattern = re.compile("[\\w-]+", re.UNICODE)
-    if not pattern.match(name):
-        logger.error("Illegal name of the node: '%s' - Node names can only contain letters, numbers, hyphens and underscores.", name)
-        exit(1)
-#    else:
-#        logger.error('Name of the node:%s is ok.', name)
-
 def isTrue(autogenerate, attributeName):
         attributeValue = autogenerate.get(attributeName)
         if attributeValue == None or attributeValue == 'false':
@@ -334,101 +189,34 @@ def isFalse(autogenerate, attributeName):
             logger.error('Unknown value of \'%s\' tag: %s.', attributeName, attributeValue)
             return False
 
-def generateNodes(root, parent, parentAbortSettings, parentAgainSettings, parentBackSettings, parentRepeatSettings, parentGenericSettings):
-    global parent_map
-    # GENERATE NAMES
-    for node in root.findall('node'):
-        generateNodeName(node, '')
-        logger.verbose('Found node: %s in: %s', node.find('name').text, parent.find('name').text if parent is not None else 'root')
-
-    # READ NODES PROPERTIES
-    abortSettings = None
-    againSettings = None
-    backSettings = None
-    repeatSettings = None
-    genericSettings = None
-
-    for autogenerate in root.findall('autogenerate'):
-        if autogenerate.get('type') == 'abort':
-            logger.verbose('Abort settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            abortSettings = autogenerate
-        if autogenerate.get('type') == 'again':
-            logger.verbose('Again settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            againSettings = autogenerate
-        if autogenerate.get('type') == 'back':
-            logger.verbose('Back settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            backSettings = autogenerate
-        if autogenerate.get('type') == 'repeat':
-            logger.verbose('Repeat settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            repeatSettings = autogenerate
-        if autogenerate.get('type') == 'generic':
-            logger.verbose('Generic settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            genericSettings = autogenerate
-
-    abortSettings = mergeSettings(abortSettings, parentAbortSettings)
-    # TODO discuss how those funcitonality should work and if it is possible to implement it just in conversation
-    #againSettings = mergeSettings(againSettings, parentAgainSettings)
-    #backSettings = mergeSettings(backSettings, parentBackSettings)
-    repeatSettings = mergeSettings(repeatSettings, parentRepeatSettings)
-    genericSettings = mergeSettings(genericSettings, parentGenericSettings)
-
-    # generate if settings exist and are not switched off
-    abort = True if (abortSettings is not None and not isFalse(abortSettings, 'on')) else False
-    again = True if (againSettings is not None and not isFalse(againSettings, 'on')) else False
-    back = True if (backSettings is not None and not isFalse(backSettings, 'on')) else False
-    repeat = True if (repeatSettings is not None and not isFalse(repeatSettings, 'on')) else False
-    generic = True if (genericSettings is not None and not isFalse(genericSettings, 'on')) else False
-
-    indexOfInsertion = len(root)
-    for index in range(0, len(root)):
-        node = root[index]
-        if node.tag == 'node':
-            condition = node.find('condition')
-            # TODO check if we generate condition 'anything_else' for nodes without condition
-            # we want to generate CONTROL nodes before repeat section
-            if condition is None or condition.text == 'anything_else' or condition.text.startswith(('anything_else', '$tries')):
-                indexOfInsertion = index
-                break
-
-    # GENERATE NEW NODES
-    if abort:
-        # ABORT NODE RETURNING TO THE MAIN MENU
-        root.insert(indexOfInsertion, generateAbortNode(root, parent, abortSettings))
-        indexOfInsertion = indexOfInsertion + 1
-    if again:
-        # AGAIN NODE REPEAT CURRENT STEP
-        root.insert(indexOfInsertion, generateAgainNode(root, parent, againSettings))
-        indexOfInsertion = indexOfInsertion + 1
-    if back:
-        # BACK NODE RETURNING TO PREVIOUS NODE
-        root.insert(indexOfInsertion, generateBackNode(root, parent, backSettings))
-        indexOfInsertion = indexOfInsertion + 1
-    if generic:
-        # GENERIC NODE
-        for genericChild in genericSettings:
-            genericChildCopy = copy.deepcopy(genericChild)
-            generateNodeName(genericChildCopy, 'GENERIC_')
-            root.insert(indexOfInsertion, genericChildCopy)
-            indexOfInsertion = indexOfInsertion + 1
-    if repeat:
-        generateRepeatNodes(root, parent, repeatSettings)
+class AutogenerateSettings(object):
+    """Settings of autogenerated nodes merged from <autogenerate> element and settings inherited from the parent
 
-    for node in root.findall('node'):
-        # PROCESS CHILD NODES
-        children = node.find('nodes')
-        if children is not None:
-            # propagate settings only if propagation not switched off
-            generateNodes(
-                children,
-                node,
-                abortSettings if abortSettings is not None and not isFalse(abortSettings, 'propagate') else None,
-                againSettings if againSettings is not None and not isFalse(againSettings, 'propagate') else None,
-                backSettings if backSettings is not None and not isFalse(backSettings, 'propagate') else None,
-                repeatSettings if repeatSettings is not None and not isFalse(repeatSettings, 'propagate') else None,
-                genericSettings if genericSettings is not None and not isFalse(genericSettings, 'propagate') else None
-            )
+    Behaves like read-only <autogenerate> element (get, find, iteration over child elements). Child elements
+    are shared with the <autogenerate> elements they come from, they have to be copied when inserted to the dialog.
+    """
+
+    def __init__(self, attrib, elements):
+        self.attrib = attrib
+        self.elements = elements
+
+    def get(self, attributeName, default=None):
+        return self.attrib.get(attributeName, default)
+
+    def find(self, tag):
+        for element in self.elements:
+            if element.tag == tag:
+                return element
+        return None
+
+    def __iter__(self):
+        return iter(self.elements)
 
 def mergeSettings(childSettings, parentSettings):
+    """Returns settings of autogenerated nodes given by child settings, missing values are taken from parent settings
+
+    Neither child nor parent settings are modified, so they can be shared by all subtrees (and all compilations).
+    """
     if childSettings is None:
         logger.verbose('Returning parent settings')
         return parentSettings
@@ -436,410 +224,1047 @@ def mergeSettings(childSettings, parentSettings):
         logger.verbose('Returning child settings')
         return childSettings
     # for all child elements
+    elements = list(childSettings)
+    tags = set(element.tag for element in elements)
     for element in parentSettings:
-        if childSettings.find(element.tag) is None:
-            childSettings.append(element)
+        if element.tag not in tags:
+            elements.append(element)
+            tags.add(element.tag)
     # for all attributes
-    for attributeName in parentSettings.attrib:
-        if childSettings.get(attributeName) is None:
-            childSettings.set(attributeName, parentSettings.get(attributeName))
+    attrib = dict(parentSettings.attrib)
+    attrib.update(childSettings.attrib)
     logger.verbose('Returning merged settings')
-    return childSettings
-
-def generateAbortNode(root, parent, settings):
-    # node
-    abortNode = LET.Element('node')
-    generateNodeName(abortNode, 'ABORT_')
-    logger.verbose('Generate abort node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', abortNode.find('name').text)
-    # condition
-    abortNodeCondition = LET.Element('condition')
-    abortNodeCondition.text = DEFAULT_CONDITION_ABORT + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
-
-    abortNode.append(abortNodeCondition)
-    # output
-    abortNodeOutput = LET.Element('output')
-    if parent is not None:
-        abortNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_ABORT_MESSAGE.text
-    else:
-        abortNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_ABORT_MESSAGE_CANNOT.text
-    abortNode.append(abortNodeOutput)
-    # goto
-    if settings.find('goto') is not None:
-        abortNode.append(copy.deepcopy(settings.find('goto')))
-    return abortNode
-
-def generateAgainNode(root, parent, settings):
-    # node
-    againNode = LET.Element('node')
-    generateNodeName(againNode ,'AGAIN_')
-    logger.verbose('Generate again node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', againNode.find('name').text)
-    # condition
-    againNodeCondition = LET.Element('condition')
-    againNodeCondition.text = DEFAULT_CONDITION_AGAIN + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
-    againNode.append(againNodeCondition)
-    # output
-    againNodeOutput = LET.Element('output')
-    againNodeOutput.text = '$againMessage'
-    againNode.append(againNodeOutput)
-    # goto
-    againNodeGoto = LET.Element('goto')
-    againNodeGotoTarget = LET.Element('target')
-    againNodeGotoTarget.text = root.find('node').find('name').text
-    againNodeGoto.append(againNodeGotoTarget)
-    againNode.append(againNodeGoto)
-    return againNode
-
-def generateBackNode(root, parent, settings):
-    # node
-    backNode = LET.Element('node')
-    generateNodeName(backNode, 'BACK_')
-    logger.verbose('Generate back node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', backNode.find('name').text)
-    # condition
-    backNodeCondition = LET.Element('condition')
-    backNodeCondition.text = DEFAULT_CONDITION_BACK + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
-    backNode.append(backNodeCondition)
-    if parent is not None and parent in parent_map and parent_map[parent] in parent_map:
-        # output
-        backNodeOutput = LET.Element('output')
-        backNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_BACK_MESSAGE.text
-        backNode.append(backNodeOutput)
-        # goto
-        backNodeGoto = LET.Element('goto', {'selector':'body'})
-        backNodeTarget = LET.Element('target')
-        backNodeTarget.text = parent_map[parent_map[parent]].find('name').text
-        backNodeGoto.append(backNodeTarget)
-        backNode.append(backNodeGoto)
-    else:
-        # output
-        backNodeOutput = LET.Element('output')
-        if parent is not None:
-            backNodeOutput.text = settings.find('message_to_main').text if settings.find('message_to_main') is not None else DEFAULT_BACK_MESSAGE_TO_MAIN.text
-        else:
-            backNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_BACK_MESSAGE_CANNOT.text
-        backNode.append(backNodeOutput)
-    return backNode
-
-def generateRepeatNodes(root, parent, settings):
-    if parent is None: return
-    logger.verbose('Generate repeat nodes for parent: %s START', parent.find('name').text if parent is not None else 'root')
-    # ADD VARIABLE 'attempts_*' TO PARENT'S CONTEXT AND SET IT TO ZERO (FOR SURE)
-    repeatVarName = 'attempts_' + parent.find('name').text.replace('-', '') # remove hyphens (they cause problems in mathematical expressions where they act as minus signs)
-    # context
-    context = parent.find('context')
-    if context is None:
-        context = LET.Element('context')
-        parent.append(context)
-    contextRepeat = LET.Element(repeatVarName, {'type':'number'})
-    contextRepeat.text = '0'
-    context.append(contextRepeat)
-    # goto for repetation
-    if root.find('node') is None:
-      logger.error('Repeat node without options to input something!!!')
-    repeatNodeGoto = LET.Element('goto')
-    repeatNodeGotoTarget = LET.Element('target')
-    repeatNodeGotoTarget.text = root.find('node').find('name').text
-    repeatNodeGoto.append(repeatNodeGotoTarget)
-    # max attempts
-    maxAttempts = int(settings.find('attempts').text) if settings is not None and settings.find('attempts') is not None else DEFAULT_REPEAT_ATTEMPTS
-    logger.verbose('maxAttempts: %s', maxAttempts)
-    # output sentences
-    outputs = settings.find('outputs').findall('output') if settings.find('outputs') is not None and len(settings.find('outputs').findall('output')) > 0 else DEFAULT_REPEAT_MESS_TEMPLATES['default']
-    logger.verbose('nOutputs: %s', len(outputs))
-    # LAST NODE (RETURNING TO THE MAIN MENU)
-    generateRepeatNode(parent, root, outputs[-1], maxAttempts-1, repeatVarName, 0, settings.find('goto'))
-    logger.verbose('LAST NODE')
-    # MIDDLE NODE
-    for i in range(min(maxAttempts-1, len(outputs)-1) -1, 0, -1):
-        generateRepeatNode(parent, root, outputs[i], i, repeatVarName, '<?$' + repeatVarName +' + 1?>', repeatNodeGoto)
-        logger.verbose('MIDDLE NODE number: %d', i)
-    # FIRST (DEFAULT) NODE
-    generateRepeatNode(parent, root, outputs[0], 0, repeatVarName, '<? $' + repeatVarName + ' == null ? 0 : $' + repeatVarName + ' + 1 ?>', repeatNodeGoto)
-    logger.verbose('FIRST NODE')
-    logger.verbose('Generate repeat nodes for parent: %s ', parent.find('name').text if parent is not None else 'root')
-
-def generateRepeatNode(parent, root, output, attempts, varName, varValue, goto):
-    # node
-    repeatNode = LET.Element('node')
-    generateNodeName(repeatNode, 'REPEAT_')
-    logger.verbose('Generate repeat node for parent: %s named: %s START', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
-    # condition
-    repeatNodeCondition = LET.Element('condition')
-    repeatNodeCondition.text = ('$' + varName + ' == null or ' if attempts == 0 else '') + '$' + varName + ' >= ' + str(attempts)
-    repeatNode.append(repeatNodeCondition)
-    # context
-    repeatNodeContext = LET.Element('context')
-    repeatVariable = LET.Element(varName)
-    repeatVariable.text = str(varValue)
-    if isinstance(varValue, int):
-        repeatVariable.set('type', 'number')
-    repeatNodeContext.append(repeatVariable)
-    repeatNode.append(repeatNodeContext)
-    # output
-    repeatNode.append(copy.deepcopy(output))
-    # goto
-    if goto is not None:
-        repeatNode.append(copy.deepcopy(goto))
-    root.append(repeatNode)
-    logger.verbose('Generate repeat node for parent: %s named: %s END', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
-
-def printNodes(root, parent, dialogJSON):
-    """Converts parsed XML to JSON structure
+    return AutogenerateSettings(attrib, elements)
 
-    Args:
-        root (_Element): root of the parsed XML tree - (typically there is element "nodes" )
-        parent (_Element): initially None, then parent
-        dialogJSON (string): generated JSON
-    """
-    global firstNode
-    # PROCESS SIBLINGS
-    previousSibling = None
-    for nodeXML in root: # for each node in nodes
-        if not (nodeXML.tag == 'node' or nodeXML.tag == 'slot' or nodeXML.tag == 'handler' or nodeXML.tag == 'response'):
-            continue
-        # fix name
-        if nodeXML.find('name') is None:
-            generateNodeName(nodeXML, '')
-        else:
-            validateNodeName(nodeXML)
-        nodeJSON = {'dialog_node':nodeXML.find('name').text}
-        dialogJSON.append(nodeJSON)
-        logger.verbose("===============================")
-        logger.verbose("name %s", nodeXML.find('name').text)
-
-        children = []
-
-        # TITLE
-        if nodeXML.get('title') is not None:
-            nodeJSON['title'] = nodeXML.get('title')
-        # TYPE
-        if nodeXML.find('type') is not None:
-            nodeJSON['type'] = nodeXML.find('type').text
-        elif nodeXML.find('slots') is not None:
-            nodeJSON['type'] = "frame"
-        # disabled
-        if nodeXML.find('disabled') is not None:
-            if nodeXML.find('disabled').text in ["True", "true"]:
-                nodeJSON['disabled'] = True
-            elif nodeXML.find('disabled').text in ["False", "false"]:
-                nodeJSON['disabled'] = False
-            else:
-                nodeJSON['disabled'] = nodeXML.find('disabled').text
-                logger.error("Unable to parse boolean " + nodeXML.find('disabled').text)
-        # EVENTNAME
-        if nodeXML.get('eventName') is not None:
-            nodeJSON['event_name'] = nodeXML.get('eventName')
-            nodeJSON['type'] = 'event_handler'
-        if nodeXML.find('event_name') is not None:
-            nodeJSON['event_name'] = nodeXML.find('event_name').text
-        # VARIABLE
-        if nodeXML.get('variable') is not None:
-            nodeJSON['variable'] = nodeXML.get('variable')
-            nodeJSON['type'] = 'slot'
-        if nodeXML.tag == 'response':
-            nodeJSON['type'] = 'response_condition'
-        # CONDITION
-        if nodeXML.find('condition') is not None:
-            if nodeXML.find('condition').text is not None:
-                nodeJSON['conditions'] = nodeXML.find('condition').text
-            else:
-                nodeJSON['conditions'] = ""
-        elif 'type' in nodeJSON:
-            if nodeJSON['type'] == 'default':
-                nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
-            elif nodeJSON['type'] == 'yes':
-                nodeJSON['conditions'] = DEFAULT_CONDITION_YES
-            elif nodeJSON['type'] == 'no':
-                nodeJSON['conditions'] = DEFAULT_CONDITION_NO
-#            else:
-#                nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
-        else:
-            nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
-        # OUTPUT
-        if nodeXML.find('output') is not None:
-            outputNodeXML = nodeXML.find('output')
-            for responseNodeXML in outputNodeXML.findall('response'): #responses are translated to seperate nodes
-                children.append(responseNodeXML)
-                outputNodeXML.remove(responseNodeXML)
-            # this should be somewhere in generate
-            if outputNodeXML.text: # if any free text - create an element <text> txt </text> out of it and delete it
-                if outputNodeXML.text.strip():
-                    outputNodeTextXML = LET.Element('text')
-                    outputNodeTextXML.text = outputNodeXML.text
-                    outputNodeXML.append(outputNodeTextXML)
-                    # TODO save againMessage
-                outputNodeXML.text = None
-            if outputNodeXML.find('textValues') is not None:
-                outputNodeTextXML = outputNodeXML.find('textValues')
-                if outputNodeTextXML.get('structure') is not None:
-                    for outputNodeTextValueXML in outputNodeTextXML.findall('values'):
-                        outputNodeTextValueXML.attrib['structure'] = outputNodeTextXML.get('structure')
-                    outputNodeTextXML.attrib.pop('structure')
-                #rename textValues element to text
-                outputNodeTextXML.tag = 'text'
-
-            #if len(outputNodeXML.getchildren()) == 0: # remove empy output ("output": Null cannot be uploaded to WA)
-            #    nodeXML.remove(outputNodeXML)
-            #else:
-            convertAll(nodeJSON, outputNodeXML)
-        # CONTEXT
-        if nodeXML.find('context') is not None:
-            convertAll(nodeJSON, nodeXML.find('context'))
-        # METADATA
-        if nodeXML.find('metadata') is not None:
-            convertAll(nodeJSON, nodeXML.find('metadata'))
-        # ACTIONS
-        if nodeXML.find('actions') is not None:
-            actionsXML = nodeXML.find('actions')
-            nodeJSON['actions'] = []
-            for actionXML in actionsXML.findall('action'):
-                actionJSON = {}
-                convertAll(actionJSON, actionXML)
-                nodeJSON['actions'].append(actionJSON['action'])
-        # GO TO
-        if nodeXML.find('goto') is not None:
-            if nodeXML.find('goto').find('target') is None:
-                logger.warning('missing goto target in node: %s', nodeXML.find('name').text)
-            elif nodeXML.find('goto').find('target').text == '::FIRST_SIBLING':
-                nodeXML.find('goto').find('target').text = next(x for x in root if x.tag == 'node').find('name').text
-            gotoJson = {'dialog_node':nodeXML.find('goto').find('target').text}
-            gotoJson['behavior'] = nodeXML.find('goto').find('behavior').text if nodeXML.find('goto').find('behavior') is not None else DEFAULT_BEHAVIOR
-            gotoJson['selector'] = nodeXML.find('goto').find('selector').text if nodeXML.find('goto').find('selector') is not None else DEFAULT_SELECTOR
-            nodeJSON['next_step'] = gotoJson
-        # PARENT
-        if parent is not None:
-            nodeJSON['parent'] = parent.find('name').text
-        # PREVIOUS SIBLING
-        if previousSibling is not None:
-            nodeJSON['previous_sibling'] = previousSibling.find('name').text
-        # DIGRESSION SETTINGS
-        if nodeXML.find('digress_in') is not None:
-            nodeJSON['digress_in'] = nodeXML.find('digress_in').text
-        if nodeXML.find('digress_out') is not None:
-            nodeJSON['digress_out'] = nodeXML.find('digress_out').text
-        if nodeXML.find('digress_out_slots') is not None:
-            nodeJSON['digress_out_slots'] = nodeXML.find('digress_out_slots').text
-
-        # TYPE DEFAULT
-        if not 'type' in nodeJSON:
-            nodeJSON['type'] = "standard"
-
-        # CLOSE NODE
-        previousSibling = nodeXML
-
-        # ADD ALL CHILDREN NODES
-        nodes = nodeXML.find('nodes')
-        if nodes is not None:
-            children.extend(nodes)
-
-        # ADD ALL SLOTS (FRAME FUNCTIONALITY)
-        slots = nodeXML.find('slots')
-        if slots is not None:
-            children.extend(slots)
-
-        # ADD ALL HANDLERS (FRAME FUNCTIONALITY)
-        handlers = nodeXML.find('handlers')
-        if handlers is not None:
-            children.extend(handlers)
-
-        # PROCESS ALL CHILDREN
-        if children:
-            printNodes(children, nodeXML, dialogJSON)
+def parseNumber(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def parseBoolean(text):
+    if text in ["True", "true"]:
+        return True
+    elif text in ["False", "false"]:
+        return False
+    raise ValueError(text)
 
+# parsers of the texts of elements with type attribute
+TYPE_PARSERS = {
+    'number': (parseNumber, "Unable to parse number '%s'"),
+    'boolean': (parseBoolean, "Unable to parse boolean %s"),
+}
+
+# place of the element in its JSON parent (replaced when the element is converted)
+PLACEHOLDER = object()
+
+# values of terminal elements without children with structure attribute
+EMPTY_STRUCTURES = {
+    'emptyList': list,
+    'emptyDict': dict,
+}
 
 def convertAll(upperNodeJson, nodeXml):
     """Transform object representation of XML to JSON
 
+    Elements are converted iteratively - each element gets its place (key) in its JSON parent first and
+    it is converted (and its children get their places) when it is taken from the stack.
+
     Args:
         upperNodeJson (string): Upper node Json representation, it is both input and output. Output is extended by
             nodeXml translated to JSON
         nodeXml (Element): Parsed XML representation to be translated
     """
+    verbose = isVerbose(logger)
     key = nodeXml.tag #key is index/selector to upperNodeJson, it is either name (e.g. generic)
-    logger.verbose("tag '%s'", nodeXml.tag)
     if type(upperNodeJson) is list:  # or an index of the last element of the array
         key = len(upperNodeJson) - 1
-    logger.verbose("key '%s'", str(key))
-    if nodeXml.get(XSI+'nil') is not None:
-        if nodeXml.get(XSI+'nil') in ["True", "true"]:
-            logger.verbose("Tag is None")
-            upperNodeJson[key] = None
-            return
-        elif nodeXml.text in ["False", "false"]:
-            pass
-        else:
-            logger.error("Unable to parse boolean " + nodeXml.get(XSI+'nil'))
-
-    if not list(nodeXml): # it has no children (subtags) - it is a terminal
-        logger.verbose("Tag is terminal")
-        logger.verbose(" structure '%s'", str(nodeXml.get('structure')))
-        if nodeXml.get('structure') is not None:
-            if nodeXml.get('structure') == 'emptyList':
-#                logger.verbose("Tag is emptyList")
-                upperNodeJson[key] = []
-                return
-            elif nodeXml.get('structure') == 'emptyDict':
-#                logger.verbose("Tag is emptyDict")
-                upperNodeJson[key] = {}
-                return
-#            elif nodeXml.get('structure') == 'listItem' and nodeXml.text:
-#                upperNodeJson[key] = []
-#                if nodeXml.text:
-#                    upperNodeJson[key].append(nodeXml.text)
-#                return
-#        if nodeXml.text is None:
-#            upperNodeJson[key] = None
-# text cannot be none, just empty
-        if nodeXml.text:  # if a single element with text - terminal (string, number or none)
-            logger.verbose("Tag has text")
-            if nodeXml.get('type') is not None and nodeXml.get('type') == 'number':
-                try:
-                    upperNodeJson[key] = int(nodeXml.text)
-                except ValueError:
+    # elements to convert: (JSON parent, key, element)
+    stack = [(upperNodeJson, key, nodeXml)]
+    while stack:
+        upperNodeJson, key, nodeXml = stack.pop()
+        if verbose:
+            logger.verbose("tag '%s'", nodeXml.tag)
+            logger.verbose("key '%s'", str(key))
+        nil = nodeXml.get(XSI+'nil')
+        if nil is not None:
+            if nil in ["True", "true"]:
+                if verbose: logger.verbose("Tag is None")
+                upperNodeJson[key] = None
+                continue
+            elif nodeXml.text in ["False", "false"]:
+                pass
+            else:
+                logger.error("Unable to parse boolean " + nil)
+
+        if not len(nodeXml): # it has no children (subtags) - it is a terminal
+            structure = nodeXml.get('structure')
+            if verbose:
+                logger.verbose("Tag is terminal")
+                logger.verbose(" structure '%s'", str(structure))
+            if structure in EMPTY_STRUCTURES:
+                upperNodeJson[key] = EMPTY_STRUCTURES[structure]()
+                continue
+            # text cannot be none, just empty
+            text = nodeXml.text
+            if text:  # if a single element with text - terminal (string, number or none)
+                typeParser = TYPE_PARSERS.get(nodeXml.get('type'))
+                if typeParser is not None:
+                    parser, errorMessage = typeParser
                     try:
-                        upperNodeJson[key] = float(nodeXml.text)
+                        upperNodeJson[key] = parser(text)
                     except ValueError:
-                        logger.error("Unable to parse number '%s'", nodeXml.text)
-            elif nodeXml.get('type') is not None and nodeXml.get('type') == 'boolean':
-                if nodeXml.text in ["True", "true"]:
-                    upperNodeJson[key] = True
-                elif nodeXml.text in ["False", "false"]:
-                    upperNodeJson[key] = False
+                        if parser is parseBoolean:
+                            upperNodeJson[key] = text
+                        elif type(upperNodeJson) is dict and upperNodeJson.get(key) is PLACEHOLDER:
+                            # number which can not be parsed is left out
+                            del upperNodeJson[key]
+                        logger.error(errorMessage, text)
+                else:
+                    upperNodeJson[key] = unescape(text.strip())
+                    if verbose: logger.verbose("adding '%s' to [%s]", upperNodeJson[key], str(key))
+            else:
+                upperNodeJson[key] = '' # empty string
+        else: # it has subtags
+            if verbose: logger.verbose("Tag has subtags")
+            nodeJson = upperNodeJson[key] = {}
+
+            # group elements of nodeXML according to tag (in order of the first occurrence of the tag)
+            nodeNameMap = OrderedDict()
+            for element in nodeXml:
+                nodeNameMap.setdefault(element.tag, []).append(element)
+
+            children = []
+            for name, elements in nodeNameMap.items():
+                # structure=listItem attribute results in generating array rather then object
+                if len(elements) == 1 and elements[0].get('structure') != 'listItem':
+                    # placeholder keeps the order of keys
+                    nodeJson[name] = PLACEHOLDER
+                    children.append((nodeJson, name, elements[0]))
+                else:
+                    nodeJson[name] = [None] * len(elements)
+                    children.extend((nodeJson[name], index, element) for index, element in enumerate(elements))
+            # children are converted in document order
+            stack.extend(reversed(children))
+
+def writeDialogNodes(dialogNodes, outputFile, compact=False):
+    """Writes json list of dialog nodes to the output file node by node
+
+    Output is the same as of json.dumps(list(dialogNodes), indent=4, ensure_ascii=False),
+    or without any indentation and whitespace if compact is True, but only one node is serialized at a time.
+
+    Args:
+        dialogNodes (iterable): json dialog nodes (e.g. generator returned by DialogCompiler.iterDialogNodes)
+        outputFile (file): text file opened for writing
+        compact (bool): write compact json without indentation
+    """
+    separator = ',' if compact else ',\n'
+    first = True
+    for dialogNode in dialogNodes:
+        if compact:
+            nodeStr = json.dumps(dialogNode, ensure_ascii=False, separators=(',', ':'))
+        else:
+            # nodes are items of the list, they are indented by one more level
+            nodeStr = '    ' + json.dumps(dialogNode, indent=4, ensure_ascii=False).replace('\n', '\n    ')
+        outputFile.write(('[' if compact else '[\n') if first else separator)
+        outputFile.write(nodeStr)
+        first = False
+    outputFile.write('[]' if first else (']' if compact else '\n]'))
+
+# parsed schemas (schema validators must not be shared by threads, each thread has its own)
+threadSchemas = threading.local()
+
+def getSchema(schemaFile):
+    """Returns parsed XML schema from the file (schema is parsed only once in each thread)"""
+    if not hasattr(threadSchemas, 'schemas'):
+        threadSchemas.schemas = {}
+    if schemaFile not in threadSchemas.schemas:
+        #TODO might need UTF-8
+        threadSchemas.schemas[schemaFile] = LET.XMLSchema(LET.parse(schemaFile))
+    return threadSchemas.schemas[schemaFile]
+
+def writeDialogFile(dialogNodes, outputsDirectory, outputsDialogs, compact=False):
+    """Writes dialog nodes to the file outputsDialogs in outputsDirectory (directory is created if it does not exist)"""
+    if not os.path.exists(outputsDirectory):
+        os.makedirs(outputsDirectory)
+        logger.info("Created new output directory %s", outputsDirectory)
+    with io.open(os.path.join(outputsDirectory, outputsDialogs), 'w', encoding='utf-8') as outputFile:
+        writeDialogNodes(dialogNodes, outputFile, compact)
+    logger.info("File %s created", os.path.join(outputsDirectory, outputsDialogs))
+
+
+class DialogCompiler(object):
+    """Compiles dialog in WAW xml format to the list of Watson Assistant json dialog nodes
+
+    All the state of the compilation (configuration, schema, node names, generated names counter...) is owned
+    by the compiler, so several dialogs can be compiled in one process (also in parallel threads),
+    each compilation by its own compiler.
+    """
+
+    def __init__(self, config, profiler=None):
+        self.config = config
+        # measures compilation phases (see --profile)
+        self.profiler = profiler if profiler is not None else Profiler(enabled=False)
+        self.schemaFile = None
+        self.schemaHash = None
+        # directory with the keys of successfully validated files (None if validation cache is not used)
+        self.validationCacheDirectory = None
+        # executor loading imported files in parallel
+        self.executor = None
+        # (import path, scope of imported nodes) -> futures of the imported files loaded ahead (one for each import of the file)
+        self.prefetchedImports = {}
+        self.prefetchedImportsLock = threading.Lock()
+        # scopes the dialog tree is loaded for, imports out of them are skipped (None - all imports are loaded)
+        self.loadedScopes = None
+        self.names = set()
+        self.counter = 0
+        self.parentMap = {}
+        # files and config values the generated dialog depends on (None if compilation cache is not used)
+        self.dependencies = None
+
+    def compile(self):
+        """Returns list of json dialog nodes generated from the main dialog file (common_dialog_main)"""
+        return list(self.iterDialogNodes())
+
+    def iterDialogNodes(self):
+        """Returns iterator of json dialog nodes generated from the main dialog file (common_dialog_main)
+
+        Dialog tree is processed immediately, json nodes are generated lazily one by one while iterating.
+        If common_cache_directory is set and none of the inputs changed since the last compilation,
+        dialog nodes are taken from the cache.
+        """
+        return next(self.iterScopesDialogNodes([getattr(self.config, 'common_scope', None)]))[1]
+
+    def iterScopesDialogNodes(self, scopes):
+        """Yields pairs (scope, iterator of json dialog nodes) - dialog compiled for each of the scopes
+
+        Dialog files are parsed, validated and imported only once (and only if some scope is not cached),
+        then the tree is copied for each scope, pruned and compiled by a compiler of that scope.
+        """
+        dialogTreeFile = getOptionalParameter(self.config, 'common_dialog_main') or sys.stdin
+
+        if not os.path.exists(dialogTreeFile):
+            logger.critical('Root dialog file %s not found.', dialogTreeFile)
+            exit(1)
+
+        cacheDirectory = getCacheDirectory(self.config, __file__)
+        schemaParam = getOptionalParameter(self.config, 'common_schema')
+        schemaDirname = os.path.split(os.path.abspath(__file__))[0]
+        root = None
+        for index, scope in enumerate(scopes):
+            scopeCompiler = self.getScopeCompiler(scope)
+            # compilation cache
+            if cacheDirectory:
+                cacheKey = hashString(os.path.abspath(dialogTreeFile), os.path.join(schemaDirname, schemaParam) if schemaParam else '',
+                                      scope or '', hashFile(os.path.abspath(__file__)))
+                dialogNodes = scopeCompiler.getCachedDialog(cacheDirectory, cacheKey)
+                if dialogNodes is not None:
+                    logger.info("Inputs of %s not changed, reusing cached dialog (scope: %s)", dialogTreeFile, scope)
+                    yield scope, iter(dialogNodes)
+                    continue
+                if self.dependencies is None:
+                    self.dependencies = {'files': {}, 'config': {}, 'cacheable': True}
+                    self.recordFileDependency(dialogTreeFile)
+
+            if root is None:
+                # the tree is loaded only once for this and all the following scopes
+                self.loadedScopes = set(scopes[index:])
+                root = self.loadDialogTree(dialogTreeFile, schemaParam, schemaDirname)
+            scopeCompiler.dependencies = self.dependencies
+            # the last scope can consume the loaded tree itself
+            scopeRoot = root if index == len(scopes) - 1 else copy.deepcopy(root)
+            dialogNodes = scopeCompiler.generateDialog(scopeRoot)
+            if self.dependencies is not None and self.dependencies['cacheable']:
+                dialogNodes = scopeCompiler.cacheDialogNodes(dialogNodes, cacheDirectory, cacheKey)
+            yield scope, dialogNodes
+
+    def getScopeCompiler(self, scope):
+        """Returns compiler for the given scope (this one if it is the configured scope)"""
+        if getattr(self.config, 'common_scope', None) == scope:
+            return self
+        scopeConfig = copy.copy(self.config)
+        setattr(scopeConfig, 'common_scope', scope)
+        return DialogCompiler(scopeConfig, self.profiler)
+
+    def cacheDialogNodes(self, dialogNodes, cacheDirectory, cacheKey):
+        """Yields all dialog nodes and stores them to the cache when the last one is generated"""
+        cachedNodes = []
+        for dialogNode in dialogNodes:
+            cachedNodes.append(dialogNode)
+            yield dialogNode
+        writeCacheEntry(cacheDirectory, cacheKey, {'files': self.dependencies['files'], 'config': self.dependencies['config'], 'dialog': cachedNodes})
+
+    def replaceConfigVariable(self, repl):
+        # repl.text  - name of the variable to be replaced
+        # getattr(self.config, repl.text) - value of replacement
+        # whole segment <replace>...</replace>
+        if repl.text=='internal_build_date_time':
+            middle= unicode(datetime.datetime.now().strftime("%y-%m-%d-%H-%M"))
+            self.recordUncacheable()
+        else:
+            middle=getattr(self.config, repl.text) if hasattr(self.config, repl.text) else ""
+            self.recordConfigDependency(repl.text, middle)
+        repl.getparent().text = ("" if repl.getparent().text is None else repl.getparent().text) + middle + ("" if repl.tail is None else repl.tail)
+        repl.getparent().remove(repl)
+
+    def recordFileDependency(self, filePath):
+        if self.dependencies is not None:
+            self.dependencies['files'][os.path.abspath(filePath)] = hashFile(filePath)
+
+    def recordConfigDependency(self, name, value):
+        if self.dependencies is not None:
+            self.dependencies['config'][name] = value
+
+    def recordUncacheable(self):
+        # output differs in every run (e.g. it contains build time), it can not be reused
+        if self.dependencies is not None:
+            self.dependencies['cacheable'] = False
+
+    def getCachedDialog(self, cacheDirectory, cacheKey):
+        """Returns dialog nodes generated by some previous run or None if any input of that run changed
+
+        Args:
+            cacheDirectory (string): directory with the cache entries of this script
+            cacheKey (string): key of the entry (given by the root file, schema, scope and version of this script)
+        """
+        entry = readCacheEntry(cacheDirectory, cacheKey)
+        if entry is None:
+            logger.verbose('No cached dialog found')
+            return None
+        if not filesUnchanged(entry['files']):
+            return None
+        for name, value in entry['config'].items():
+            if (getattr(self.config, name) if hasattr(self.config, name) else "") != value:
+                logger.verbose("Config value %s changed", name)
+                return None
+        return entry['dialog']
+
+    def validate(self, xml, filePath, imported):
+        importedStr = "imported" if imported else "root"
+        validationCacheKey = None
+        if self.validationCacheDirectory:
+            # the same content was already successfully validated against the same schema
+            validationCacheKey = hashString(hashlib.sha256(LET.tostring(xml)).hexdigest(), self.schemaHash)
+            if readCacheEntry(self.validationCacheDirectory, validationCacheKey) is not None:
+                logger.verbose("%s XML %s is valid (cached)", importedStr, filePath)
+                return
+        try:
+            with self.profiler.phase('validate'):
+                getSchema(self.schemaFile).assertValid(xml)
+            logger.verbose("%s XML %s is valid", importedStr, filePath)
+        except LET.DocumentInvalid as e:
+            logger.critical("Invalid %s XML: %s", importedStr, filePath)
+            logger.critical(e)
+            exit(1)
+        if validationCacheKey:
+            writeCacheEntry(self.validationCacheDirectory, validationCacheKey, {'file': os.path.abspath(filePath)})
+
+
+    def importText(self, imp):
+        filename = imp.text.split('/')
+        logger.verbose('Importing %s', os.path.join(os.path.dirname(getRequiredParameter(self.config, 'common_dialog_main')), *filename))
+        self.recordFileDependency(os.path.join(os.path.dirname(getRequiredParameter(self.config, 'common_dialog_main')), *filename))
+        fp = io.open(os.path.join(os.path.dirname(getRequiredParameter(self.config, 'common_dialog_main')),*filename) ,'r', encoding='utf-8')
+        importTxt = fp.read()
+        fp.close()
+        imp.getparent().text = ("" if imp.getparent().text is None else imp.getparent().text) + importTxt + ("" if imp.tail is None else imp.tail)
+        imp.getparent().remove(imp)
+
+    def preprocessImportedTree(self, importTree):
+        """Replaces all <importText> and <replace> elements of the imported tree by their values (in one pass over the tree)
+
+        All <importText> elements are processed before <replace> elements, text of both is appended to the text of their parent.
+        """
+        imports = []
+        replaces = []
+        for element in importTree.iter('importText', 'replace'):
+            if element.tag == 'importText':
+                imports.append(element)
+            else:
+                replaces.append(element)
+        for imp in imports:
+            self.importText(imp)
+        for repl in replaces:
+            self.replaceConfigVariable(repl)
+
+    def loadImportedTree(self, importPath, importScope=None):
+        """Parses imported dialog file, replaces its <importText> and <replace> elements and validates it
+
+        importScope (scope of the import or of the root of the imported file) is the scope of all imported nodes.
+        """
+        with self.profiler.phase('parse'):
+            importTree = LET.parse(importPath)
+        self.preprocessImportedTree(importTree)
+
+        if self.schemaFile is not None:
+            self.validate(importTree, importPath, True)
+        if self.executor is not None:
+            # files imported by this one are loaded before they are needed
+            self.prefetchImports(importTree.getroot(), True, importScope)
+        return importTree
+
+    def getImportPath(self, importElement):
+        return os.path.join(os.path.dirname(getattr(self.config, 'common_dialog_main')), *importElement.text.split('/'))
+
+    def prefetchImports(self, root, imported, importScope=None):
+        """Starts loading of all files which will be imported to the tree by importNodes (imported by imported files too)
+
+        Only the files importNodes imports are loaded (the same scope checks are applied), so every prefetched
+        file is used and files out of loaded scopes are never parsed nor validated.
+
+        Args:
+            root (_Element): root <nodes> element
+            imported (bool): root is a root of imported file (only its nodes are imported, not its imports)
+            importScope (string): scope of all nodes of the imported file
+        """
+        imports = []
+        stack = [root]
+        while stack:
+            nodes = stack.pop()
+            if not imported or nodes is not root:
+                for importElement in nodes.iterchildren('import'):
+                    if self.isLoadedScope(importElement.get('scope')):
+                        imports.append(importElement)
+            for node in nodes.iterchildren('node'):
+                # importNodes skips imported nodes which are out of the scope of the import
+                if imported and nodes is root and importScope is not None and node.get('scope') not in (None, importScope):
+                    continue
+                children = node.find('nodes')
+                if children is not None and self.isLoadedScope(node.get('scope')) and self.isLoadedScope(children.get('scope')):
+                    stack.append(children)
+        for importElement in imports:
+            importPath = self.getImportPath(importElement)
+            # missing files are reported by importNodes
+            if not os.path.exists(importPath):
+                continue
+            nodesScope = self.getImportedNodesScope(importElement.get('scope'), getRootScope(importPath))
+            if nodesScope is not False:
+                future = self.executor.submit(self.loadImportedTree, importPath, nodesScope)
+                with self.prefetchedImportsLock:
+                    self.prefetchedImports.setdefault((importPath, nodesScope), deque()).append(future)
+
+    def getImportedNodesScope(self, importScope, rootScope):
+        """Returns scope of nodes imported by the import of the given scope from the file with root of the given scope
+        (None if they have no scope), False if the file is out of loaded scopes and it is not imported
+        """
+        if not self.isLoadedScope(rootScope) or (importScope is not None and rootScope is not None and importScope != rootScope):
+            return False
+        return importScope or rootScope
+
+    def getImportedTree(self, importPath, importScope):
+        """Returns future of the loaded imported file (it is loaded by executor if it was not prefetched)"""
+        with self.prefetchedImportsLock:
+            futures = self.prefetchedImports.get((importPath, importScope))
+            if futures:
+                return futures.popleft()
+        return self.executor.submit(self.loadImportedTree, importPath, importScope)
+
+    def importNodes(self, root):
+        # IMPORT AND APPEND NODES
+        defaultNode = None
+        if len(root) > 0 and (root[len(root)-1].find('condition') is None or (root[len(root)-1].find('condition') is not None and root[len(root)-1].find('condition').text == 'anything_else')):
+            # IF LAST NODE DOES NOT HAVE CONDITION OR HAS CONDITION SET TO 'anything_else'
+            defaultNode = root[len(root)-1]
+
+        importElements = []
+        importPaths = []
+        importScopes = []
+        for node in root.findall('import'):
+            # imports out of loaded scopes are not read at all
+            if not self.isLoadedScope(node.get('scope')):
+                logger.verbose('Skipping import %s out of scope', node.text)
+                continue
+            logger.verbose('Importing %s', os.path.join(os.path.dirname(getattr(self.config, 'common_dialog_main')), node.text))
+            importPath = self.getImportPath(node)
+            if not os.path.exists(importPath):
+                logger.critical('Imported dialog file %s not found.', importPath)
+                exit(1)
+            self.recordFileDependency(importPath)
+            # imported files with root out of loaded scopes are not parsed
+            importScope = self.getImportedNodesScope(node.get('scope'), getRootScope(importPath))
+            if importScope is False:
+                logger.verbose('Skipping imported file %s out of scope', importPath)
+                continue
+            importElements.append(node)
+            importPaths.append(importPath)
+            importScopes.append(importScope)
+
+        # imported files are parsed, preprocessed and validated in parallel (if there is an executor), merged in order
+        if self.executor is not None:
+            importTrees = [future.result() for future in [self.getImportedTree(importPath, importScope)
+                                                          for importPath, importScope in zip(importPaths, importScopes)]]
+        else:
+            importTrees = [self.loadImportedTree(importPath, importScope) for importPath, importScope in zip(importPaths, importScopes)]
+
+        for node, importTree, importScope in zip(importElements, importTrees, importScopes):
+            importRoot = importTree.getroot()
+            # scope of the import (or of the root of imported file) is the scope of all imported nodes
+            # (the tree may be loaded for several scopes)
+            # imported nodes are inserted one after another right behind the import element
+            lastInserted = node
+            for importChild in importRoot.findall('node'):
+                if importScope is not None:
+                    if importChild.get('scope') is None:
+                        importChild.set('scope', importScope)
+                    elif importChild.get('scope') != importScope:
+                        continue # node can not be in scope of the import and in its own scope at once
+                #logger.info('  Importing node: %s', importChild)
+                """
+                nodeWithTheSameCondition = getNodeWithTheSameCondition(root, importChild)
+                if nodeWithTheSameCondition is not None:
+                    # SKIP NODES WITH SAME CONDITIONS
+                    #logger.info('    Skipping node (same condition): %s', nodeWithTheSameCondition)
+                    if importChild.find('context') is not None:
+                        #logger.info('      Context found for node: %s', importChild)
+                        if nodeWithTheSameCondition.find('context') is None:
+                            #logger.info('      Creating context for node: %s', nodeWithTheSameCondition)
+                            nodeWithTheSameConditionContext = LET.Element('context')
+                            nodeWithTheSameCondition.append(nodeWithTheSameConditionContext)
+                        # COPY ALL CONTEXT TO NODE WITH SAME CONDITION
+                        for context in importChild.find('context'):
+                            #logger.info('      Appending context: %s', context)
+                            nodeWithTheSameCondition.find('context').append(context)
+                else:
+                    # INSERT NODE
+
+                    #logger.info('    Appending node: %s', importChild)
+                """
+                lastInserted.addnext(importChild)
+                lastInserted = importChild
+
+
+        if defaultNode is not None:
+            # MOVE DEFAULT_NODE TO THE END
+            root.remove(defaultNode)
+            root.append(defaultNode)
+
+        # PROCESS CHILD NODES (nodes out of loaded scopes are removed later, they do not need their imports)
+        for node in root.findall('node'):
+            children = node.find('nodes')
+            if children is not None and self.isLoadedScope(node.get('scope')) and self.isLoadedScope(children.get('scope')):
+                self.importNodes(children)
+
+    def isLoadedScope(self, scope):
+        """Returns True if elements of the scope (None if element has no scope) are loaded to the dialog tree"""
+        return scope is None or self.loadedScopes is None or scope in self.loadedScopes
+
+    def inScope(self, node):
+        if not hasattr(self.config, 'common_scope'):
+            return False # no scope specified -> remove all scoped nodes
+        scope = getattr(self.config, 'common_scope')
+        if scope == node.get('scope'):
+            return True
+        else:
+            return False
+
+    # When duplicit node is found, exit with error
+    def preprocessTree(self, root):
+        """Prepares merged dialog tree for generation in one pass over the tree
+
+        Removes all comments and all elements which are out of specified scope, collects names of all nodes
+        and maps every element to its parent.
+
+        Returns:
+            (names, parentMap) - set of node names, dictionary child element -> parent element
+        """
+        names = set()
+        parentMap = {}
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            if element.tag == 'node' and element.get('name') is not None:
+                if element.get('name') in names:
+                    logger.error("Duplicit node name found: '%s'", element.get('name'))
+                    exit(1)
+                names.add(element.get('name'))
+            for child in list(element):
+                if child.tag is LET.Comment or (isinstance(child.tag, str) and child.get('scope') is not None and not self.inScope(child)):
+                    element.remove(child)
                 else:
-                    upperNodeJson[key] = nodeXml.text
-                    logger.error("Unable to parse boolean " + nodeXml.text)
+                    parentMap[child] = element
+            # children are visited in document order
+            stack.extend(reversed(element))
+        return names, parentMap
+
+    # creates name tag for given node using its 'name' attribute, if there is one,
+    # otherwise generates first unique combination of 'node_' + number.
+    def generateNodeName(self, node, prefix):
+        name = node.find('name')
+        if name is None:
+            if 'name' in node.attrib:
+                nodeName = LET.Element('name')
+                nodeName.text = node.get('name')
+                node.append(nodeName)
             else:
-                logger.verbose("of type text")
-                upperNodeJson[key] = unescape(nodeXml.text.strip())
-                logger.verbose("adding '%s' to [%s]", unescape(nodeXml.text.strip()), str(key))
+                while ("node_" + str(self.counter) in self.names):
+                    self.counter += 1
+                nodeName = LET.Element('name')
+                nodeName.text = "node_" + str(self.counter)
+                node.append(nodeName)
+                self.counter += 1
+    #        logger.error('Generate node name: %s', nodeName.text)
+        if prefix:
+            node.find('name').text = prefix + node.find('name').text
+        self.validateNodeName(node)
+
+    def validateNodeName(self, node):
+        name = node.find('name').text
+        # check characters (Node names can only contain letters, numbers, hyphens and underscores)
+        if not NODE_NAME_PATTERN.match(name):
+            logger.error("Illegal name of the node: '%s' - Node names can only contain letters, numbers, hyphens and underscores.", name)
+            exit(1)
+    #    else:
+    #        logger.error('Name of the node:%s is ok.', name)
+
+    def generateNodes(self, root, parent, parentAbortSettings, parentAgainSettings, parentBackSettings, parentRepeatSettings, parentGenericSettings):
+        # GENERATE NAMES
+        for node in root.findall('node'):
+            self.generateNodeName(node, '')
+            logger.verbose('Found node: %s in: %s', node.find('name').text, parent.find('name').text if parent is not None else 'root')
+
+        # READ NODES PROPERTIES
+        abortSettings = None
+        againSettings = None
+        backSettings = None
+        repeatSettings = None
+        genericSettings = None
+
+        for autogenerate in root.findall('autogenerate'):
+            if autogenerate.get('type') == 'abort':
+                logger.verbose('Abort settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                abortSettings = autogenerate
+            if autogenerate.get('type') == 'again':
+                logger.verbose('Again settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                againSettings = autogenerate
+            if autogenerate.get('type') == 'back':
+                logger.verbose('Back settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                backSettings = autogenerate
+            if autogenerate.get('type') == 'repeat':
+                logger.verbose('Repeat settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                repeatSettings = autogenerate
+            if autogenerate.get('type') == 'generic':
+                logger.verbose('Generic settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                genericSettings = autogenerate
+
+        abortSettings = mergeSettings(abortSettings, parentAbortSettings)
+        # TODO discuss how those funcitonality should work and if it is possible to implement it just in conversation
+        #againSettings = mergeSettings(againSettings, parentAgainSettings)
+        #backSettings = mergeSettings(backSettings, parentBackSettings)
+        repeatSettings = mergeSettings(repeatSettings, parentRepeatSettings)
+        genericSettings = mergeSettings(genericSettings, parentGenericSettings)
+
+        # generate if settings exist and are not switched off
+        abort = True if (abortSettings is not None and not isFalse(abortSettings, 'on')) else False
+        again = True if (againSettings is not None and not isFalse(againSettings, 'on')) else False
+        back = True if (backSettings is not None and not isFalse(backSettings, 'on')) else False
+        repeat = True if (repeatSettings is not None and not isFalse(repeatSettings, 'on')) else False
+        generic = True if (genericSettings is not None and not isFalse(genericSettings, 'on')) else False
+
+        indexOfInsertion = len(root)
+        for index, node in enumerate(root):
+            if node.tag == 'node':
+                condition = node.find('condition')
+                # TODO check if we generate condition 'anything_else' for nodes without condition
+                # we want to generate CONTROL nodes before repeat section
+                if condition is None or condition.text == 'anything_else' or condition.text.startswith(('anything_else', '$tries')):
+                    indexOfInsertion = index
+                    break
+
+        # GENERATE NEW NODES
+        if abort:
+            # ABORT NODE RETURNING TO THE MAIN MENU
+            root.insert(indexOfInsertion, self.generateAbortNode(root, parent, abortSettings))
+            indexOfInsertion = indexOfInsertion + 1
+        if again:
+            # AGAIN NODE REPEAT CURRENT STEP
+            root.insert(indexOfInsertion, self.generateAgainNode(root, parent, againSettings))
+            indexOfInsertion = indexOfInsertion + 1
+        if back:
+            # BACK NODE RETURNING TO PREVIOUS NODE
+            root.insert(indexOfInsertion, self.generateBackNode(root, parent, backSettings))
+            indexOfInsertion = indexOfInsertion + 1
+        if generic:
+            # GENERIC NODE
+            for genericChild in genericSettings:
+                genericChildCopy = copy.deepcopy(genericChild)
+                self.generateNodeName(genericChildCopy, 'GENERIC_')
+                root.insert(indexOfInsertion, genericChildCopy)
+                indexOfInsertion = indexOfInsertion + 1
+        if repeat:
+            self.generateRepeatNodes(root, parent, repeatSettings)
+
+        for node in root.findall('node'):
+            # PROCESS CHILD NODES
+            children = node.find('nodes')
+            if children is not None:
+                # propagate settings only if propagation not switched off
+                self.generateNodes(
+                    children,
+                    node,
+                    abortSettings if abortSettings is not None and not isFalse(abortSettings, 'propagate') else None,
+                    againSettings if againSettings is not None and not isFalse(againSettings, 'propagate') else None,
+                    backSettings if backSettings is not None and not isFalse(backSettings, 'propagate') else None,
+                    repeatSettings if repeatSettings is not None and not isFalse(repeatSettings, 'propagate') else None,
+                    genericSettings if genericSettings is not None and not isFalse(genericSettings, 'propagate') else None
+                )
+
+    def generateAbortNode(self, root, parent, settings):
+        # node
+        abortNode = LET.Element('node')
+        self.generateNodeName(abortNode, 'ABORT_')
+        logger.verbose('Generate abort node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', abortNode.find('name').text)
+        # condition
+        abortNodeCondition = LET.Element('condition')
+        abortNodeCondition.text = DEFAULT_CONDITION_ABORT + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
+
+        abortNode.append(abortNodeCondition)
+        # output
+        abortNodeOutput = LET.Element('output')
+        if parent is not None:
+            abortNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_ABORT_MESSAGE.text
         else:
-            upperNodeJson[key] = '' # empty string
-    else: # it has subtags
-        logger.verbose("Tag has subtags")
-        #if there is an array of subelements within elemnt - separate elements of each tag value to a separate nodeNameMap field
-        upperNodeJson[key] = {}
-
-        # Create nodeNameMap, it is an array of unique tag types in nodeXml, each element is an array containing all elements
-        #   of the given tag (it groups elements of nodeXML according to tag)
-        nodeNameMap = {}
-        for element in nodeXml:
-            if element.tag in nodeNameMap: #if tag was seen before, add it to the existing array
-                nodeNameMap[element.tag].append(element)
-            else: #if tag is seen first time - establish array
-                nodeNameMap[element.tag] = [ element ]
-
-        for name in nodeNameMap:
-            # structure=listItem attribute  results in generating array rather then object
-            #if len(nodeNameMap[name]) == 1 and nodeNameMap[name][0].get('structure') != 'listItem' and name!='values':
-            if len(nodeNameMap[name]) == 1 and nodeNameMap[name][0].get('structure') != 'listItem' :
-                convertAll(upperNodeJson[key], nodeNameMap[name][0])
-                logger.verbose("Subtag is tag")
+            abortNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_ABORT_MESSAGE_CANNOT.text
+        abortNode.append(abortNodeOutput)
+        # goto
+        if settings.find('goto') is not None:
+            abortNode.append(copy.deepcopy(settings.find('goto')))
+        return abortNode
+
+    def generateAgainNode(self, root, parent, settings):
+        # node
+        againNode = LET.Element('node')
+        self.generateNodeName(againNode ,'AGAIN_')
+        logger.verbose('Generate again node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', againNode.find('name').text)
+        # condition
+        againNodeCondition = LET.Element('condition')
+        againNodeCondition.text = DEFAULT_CONDITION_AGAIN + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
+        againNode.append(againNodeCondition)
+        # output
+        againNodeOutput = LET.Element('output')
+        againNodeOutput.text = '$againMessage'
+        againNode.append(againNodeOutput)
+        # goto
+        againNodeGoto = LET.Element('goto')
+        againNodeGotoTarget = LET.Element('target')
+        againNodeGotoTarget.text = root.find('node').find('name').text
+        againNodeGoto.append(againNodeGotoTarget)
+        againNode.append(againNodeGoto)
+        return againNode
+
+    def generateBackNode(self, root, parent, settings):
+        # node
+        backNode = LET.Element('node')
+        self.generateNodeName(backNode, 'BACK_')
+        logger.verbose('Generate back node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', backNode.find('name').text)
+        # condition
+        backNodeCondition = LET.Element('condition')
+        backNodeCondition.text = DEFAULT_CONDITION_BACK + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
+        backNode.append(backNodeCondition)
+        if parent is not None and parent in self.parentMap and self.parentMap[parent] in self.parentMap:
+            # output
+            backNodeOutput = LET.Element('output')
+            backNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_BACK_MESSAGE.text
+            backNode.append(backNodeOutput)
+            # goto
+            backNodeGoto = LET.Element('goto', {'selector':'body'})
+            backNodeTarget = LET.Element('target')
+            backNodeTarget.text = self.parentMap[self.parentMap[parent]].find('name').text
+            backNodeGoto.append(backNodeTarget)
+            backNode.append(backNodeGoto)
+        else:
+            # output
+            backNodeOutput = LET.Element('output')
+            if parent is not None:
+                backNodeOutput.text = settings.find('message_to_main').text if settings.find('message_to_main') is not None else DEFAULT_BACK_MESSAGE_TO_MAIN.text
+            else:
+                backNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_BACK_MESSAGE_CANNOT.text
+            backNode.append(backNodeOutput)
+        return backNode
+
+    def generateRepeatNodes(self, root, parent, settings):
+        if parent is None: return
+        logger.verbose('Generate repeat nodes for parent: %s START', parent.find('name').text if parent is not None else 'root')
+        # ADD VARIABLE 'attempts_*' TO PARENT'S CONTEXT AND SET IT TO ZERO (FOR SURE)
+        repeatVarName = 'attempts_' + parent.find('name').text.replace('-', '') # remove hyphens (they cause problems in mathematical expressions where they act as minus signs)
+        # context
+        context = parent.find('context')
+        if context is None:
+            context = LET.Element('context')
+            parent.append(context)
+        contextRepeat = LET.Element(repeatVarName, {'type':'number'})
+        contextRepeat.text = '0'
+        context.append(contextRepeat)
+        # goto for repetation
+        if root.find('node') is None:
+          logger.error('Repeat node without options to input something!!!')
+        repeatNodeGoto = LET.Element('goto')
+        repeatNodeGotoTarget = LET.Element('target')
+        repeatNodeGotoTarget.text = root.find('node').find('name').text
+        repeatNodeGoto.append(repeatNodeGotoTarget)
+        # max attempts
+        maxAttempts = int(settings.find('attempts').text) if settings is not None and settings.find('attempts') is not None else DEFAULT_REPEAT_ATTEMPTS
+        logger.verbose('maxAttempts: %s', maxAttempts)
+        # output sentences
+        outputs = settings.find('outputs').findall('output') if settings.find('outputs') is not None and len(settings.find('outputs').findall('output')) > 0 else DEFAULT_REPEAT_MESS_TEMPLATES['default']
+        logger.verbose('nOutputs: %s', len(outputs))
+        # LAST NODE (RETURNING TO THE MAIN MENU)
+        self.generateRepeatNode(parent, root, outputs[-1], maxAttempts-1, repeatVarName, 0, settings.find('goto'))
+        logger.verbose('LAST NODE')
+        # MIDDLE NODE
+        for i in range(min(maxAttempts-1, len(outputs)-1) -1, 0, -1):
+            self.generateRepeatNode(parent, root, outputs[i], i, repeatVarName, '<?$' + repeatVarName +' + 1?>', repeatNodeGoto)
+            logger.verbose('MIDDLE NODE number: %d', i)
+        # FIRST (DEFAULT) NODE
+        self.generateRepeatNode(parent, root, outputs[0], 0, repeatVarName, '<? $' + repeatVarName + ' == null ? 0 : $' + repeatVarName + ' + 1 ?>', repeatNodeGoto)
+        logger.verbose('FIRST NODE')
+        logger.verbose('Generate repeat nodes for parent: %s ', parent.find('name').text if parent is not None else 'root')
+
+    def generateRepeatNode(self, parent, root, output, attempts, varName, varValue, goto):
+        # node
+        repeatNode = LET.Element('node')
+        self.generateNodeName(repeatNode, 'REPEAT_')
+        logger.verbose('Generate repeat node for parent: %s named: %s START', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
+        # condition
+        repeatNodeCondition = LET.Element('condition')
+        repeatNodeCondition.text = ('$' + varName + ' == null or ' if attempts == 0 else '') + '$' + varName + ' >= ' + str(attempts)
+        repeatNode.append(repeatNodeCondition)
+        # context
+        repeatNodeContext = LET.Element('context')
+        repeatVariable = LET.Element(varName)
+        repeatVariable.text = str(varValue)
+        if isinstance(varValue, int):
+            repeatVariable.set('type', 'number')
+        repeatNodeContext.append(repeatVariable)
+        repeatNode.append(repeatNodeContext)
+        # output
+        repeatNode.append(copy.deepcopy(output))
+        # goto
+        if goto is not None:
+            repeatNode.append(copy.deepcopy(goto))
+        root.append(repeatNode)
+        logger.verbose('Generate repeat node for parent: %s named: %s END', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
+
+    def emitNodes(self, root, parentName):
+        """Converts parsed XML to JSON structure, yields JSON dialog nodes one by one (each node is followed by its children)
+
+        Args:
+            root (_Element): root of the parsed XML tree - (typically there is element "nodes" )
+            parentName (string): initially None, then name of the parent
+        """
+        verbose = isVerbose(logger)
+        # PROCESS SIBLINGS
+        previousSiblingName = None
+        firstSiblingName = None
+        for nodeXML in root: # for each node in nodes
+            if not (nodeXML.tag == 'node' or nodeXML.tag == 'slot' or nodeXML.tag == 'handler' or nodeXML.tag == 'response'):
+                continue
+            # fix name
+            if nodeXML.find('name') is None:
+                self.generateNodeName(nodeXML, '')
             else:
-                upperNodeJson[key][name] = []
-                logger.verbose("Subtag is list")
-                for element in nodeNameMap[name]:
-                    logger.verbose("adding [%s][%s] element '%s'", str(key), name, str(element))
-                    upperNodeJson[key][name].append(None)  # just to get index
-                    convertAll(upperNodeJson[key][name], element)
+                self.validateNodeName(nodeXML)
+            # all the known child elements are looked up in a single pass (the first one of each tag, like find)
+            elements = getChildElements(nodeXML)
+            name = elements['name'].text
+            nodeJSON = {'dialog_node':name}
+            if verbose:
+                logger.verbose("===============================")
+                logger.verbose("name %s", name)
+
+            children = []
+
+            # TITLE
+            if nodeXML.get('title') is not None:
+                nodeJSON['title'] = nodeXML.get('title')
+            # TYPE
+            if 'type' in elements:
+                nodeJSON['type'] = elements['type'].text
+            elif 'slots' in elements:
+                nodeJSON['type'] = "frame"
+            # disabled
+            if 'disabled' in elements:
+                disabled = elements['disabled'].text
+                if disabled in ["True", "true"]:
+                    nodeJSON['disabled'] = True
+                elif disabled in ["False", "false"]:
+                    nodeJSON['disabled'] = False
+                else:
+                    nodeJSON['disabled'] = disabled
+                    logger.error("Unable to parse boolean " + disabled)
+            # EVENTNAME
+            if nodeXML.get('eventName') is not None:
+                nodeJSON['event_name'] = nodeXML.get('eventName')
+                nodeJSON['type'] = 'event_handler'
+            if 'event_name' in elements:
+                nodeJSON['event_name'] = elements['event_name'].text
+            # VARIABLE
+            if nodeXML.get('variable') is not None:
+                nodeJSON['variable'] = nodeXML.get('variable')
+                nodeJSON['type'] = 'slot'
+            if nodeXML.tag == 'response':
+                nodeJSON['type'] = 'response_condition'
+            # CONDITION
+            if 'condition' in elements:
+                if elements['condition'].text is not None:
+                    nodeJSON['conditions'] = elements['condition'].text
+                else:
+                    nodeJSON['conditions'] = ""
+            elif 'type' in nodeJSON:
+                if nodeJSON['type'] == 'default':
+                    nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
+                elif nodeJSON['type'] == 'yes':
+                    nodeJSON['conditions'] = DEFAULT_CONDITION_YES
+                elif nodeJSON['type'] == 'no':
+                    nodeJSON['conditions'] = DEFAULT_CONDITION_NO
+    #            else:
+    #                nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
+            else:
+                nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
+            # OUTPUT
+            if 'output' in elements:
+                outputNodeXML = elements['output']
+                for responseNodeXML in outputNodeXML.findall('response'): #responses are translated to seperate nodes
+                    children.append(responseNodeXML)
+                    outputNodeXML.remove(responseNodeXML)
+                # this should be somewhere in generate
+                if outputNodeXML.text: # if any free text - create an element <text> txt </text> out of it and delete it
+                    if outputNodeXML.text.strip():
+                        outputNodeTextXML = LET.Element('text')
+                        outputNodeTextXML.text = outputNodeXML.text
+                        outputNodeXML.append(outputNodeTextXML)
+                        # TODO save againMessage
+                    outputNodeXML.text = None
+                outputNodeTextXML = outputNodeXML.find('textValues')
+                if outputNodeTextXML is not None:
+                    if outputNodeTextXML.get('structure') is not None:
+                        for outputNodeTextValueXML in outputNodeTextXML.findall('values'):
+                            outputNodeTextValueXML.attrib['structure'] = outputNodeTextXML.get('structure')
+                        outputNodeTextXML.attrib.pop('structure')
+                    #rename textValues element to text
+                    outputNodeTextXML.tag = 'text'
+
+                #if len(outputNodeXML.getchildren()) == 0: # remove empy output ("output": Null cannot be uploaded to WA)
+                #    nodeXML.remove(outputNodeXML)
+                #else:
+                convertAll(nodeJSON, outputNodeXML)
+            # CONTEXT
+            if 'context' in elements:
+                convertAll(nodeJSON, elements['context'])
+            # METADATA
+            if 'metadata' in elements:
+                convertAll(nodeJSON, elements['metadata'])
+            # ACTIONS
+            if 'actions' in elements:
+                nodeJSON['actions'] = []
+                for actionXML in elements['actions'].findall('action'):
+                    actionJSON = {}
+                    convertAll(actionJSON, actionXML)
+                    nodeJSON['actions'].append(actionJSON['action'])
+            # GO TO
+            if 'goto' in elements:
+                gotoElements = getChildElements(elements['goto'])
+                if 'target' not in gotoElements:
+                    logger.warning('missing goto target in node: %s', name)
+                elif gotoElements['target'].text == '::FIRST_SIBLING':
+                    if firstSiblingName is None:
+                        firstSiblingName = next(x for x in root if x.tag == 'node').find('name').text
+                    gotoElements['target'].text = firstSiblingName
+                gotoJson = {'dialog_node':gotoElements['target'].text}
+                gotoJson['behavior'] = gotoElements['behavior'].text if 'behavior' in gotoElements else DEFAULT_BEHAVIOR
+                gotoJson['selector'] = gotoElements['selector'].text if 'selector' in gotoElements else DEFAULT_SELECTOR
+                nodeJSON['next_step'] = gotoJson
+            # PARENT
+            if parentName is not None:
+                nodeJSON['parent'] = parentName
+            # PREVIOUS SIBLING
+            if previousSiblingName is not None:
+                nodeJSON['previous_sibling'] = previousSiblingName
+            # DIGRESSION SETTINGS
+            if 'digress_in' in elements:
+                nodeJSON['digress_in'] = elements['digress_in'].text
+            if 'digress_out' in elements:
+                nodeJSON['digress_out'] = elements['digress_out'].text
+            if 'digress_out_slots' in elements:
+                nodeJSON['digress_out_slots'] = elements['digress_out_slots'].text
+
+            # TYPE DEFAULT
+            if not 'type' in nodeJSON:
+                nodeJSON['type'] = "standard"
+
+            # CLOSE NODE
+            previousSiblingName = name
+
+            # ADD ALL CHILDREN NODES
+            if 'nodes' in elements:
+                children.extend(elements['nodes'])
+
+            # ADD ALL SLOTS (FRAME FUNCTIONALITY)
+            if 'slots' in elements:
+                children.extend(elements['slots'])
+
+            # ADD ALL HANDLERS (FRAME FUNCTIONALITY)
+            if 'handlers' in elements:
+                children.extend(elements['handlers'])
+
+            yield nodeJSON
+
+            # PROCESS ALL CHILDREN
+            if children:
+                yield from self.emitNodes(children, name)
+
+
+    def loadDialogTree(self, dialogTreeFile, schemaParam, schemaDirname):
+        """Parses and validates the root dialog file and imports all the dialog files into it, returns root of the tree"""
+        with self.profiler.phase('parse'):
+            dialogTree = LET.parse(dialogTreeFile)
+
+        # load schema
+        if schemaParam:
+            schemaFile = os.path.join(schemaDirname, schemaParam)
+            if not os.path.exists(schemaFile):
+                logger.critical('Schema file %s not found.', schemaFile)
+                exit(1)
+            self.schemaFile = os.path.abspath(schemaFile)
+            self.schemaHash = hashFile(self.schemaFile)
+            self.recordFileDependency(schemaFile)
+            cacheDirectory = getCacheDirectory(self.config, __file__)
+            if cacheDirectory:
+                self.validationCacheDirectory = os.path.join(cacheDirectory, 'validation')
+            self.validate(dialogTree, dialogTreeFile, False)
+
+        # process dialog tree
+        root = dialogTree.getroot()
+        jobs = int(getattr(self.config, 'common_jobs', 0) or 0) or os.cpu_count() or 1
+        # when profiling, imported files are loaded in this thread so that their parsing and validation is measured
+        if jobs > 1 and not self.profiler.enabled:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                self.executor = executor
+                try:
+                    # all the imported files (including files imported by them) are loaded at once
+                    self.prefetchImports(root, False)
+                    self.importNodes(root)
+                finally:
+                    self.executor = None
+                    # nothing should be left, but loading of files which are not imported must not run on
+                    for futures in self.prefetchedImports.values():
+                        for future in futures:
+                            future.cancel()
+                    self.prefetchedImports = {}
+        else:
+            with self.profiler.phase('importNodes'):
+                self.importNodes(root)
+        return root
+
+    def generateDialog(self, root):
+        """Generates dialog from the loaded tree (the tree is modified), returns generator of JSON dialog nodes"""
+        # remove all comments and nodes which are out of specified scope, find all node names
+        with self.profiler.phase('preprocess'):
+            self.names, self.parentMap = self.preprocessTree(root)
+        with self.profiler.phase('generateNodes'):
+            self.generateNodes(root, None, DEFAULT_ABORT, DEFAULT_AGAIN, DEFAULT_BACK, DEFAULT_REPEAT, DEFAULT_GENERIC)
+
+        # convert XML tree to JSON structure (lazily, node by node)
+        return self.emitNodes(root, None)
 
 
 def main(argv):
@@ -849,90 +1274,67 @@ def main(argv):
     parser.add_argument('-oc', '--common_output_config', help='output configuration file')
     parser.add_argument('-s', '--common_schema', required=False, help='schema file')
     parser.add_argument('-sc', '--common_scope', required=False, help='scope of dialog, e.g. type-local')
+    parser.add_argument('-scs', '--common_scopes', required=False, nargs='+', help='build dialog for several scopes at once (files are parsed only once), dialog of each scope is stored to a subdirectory of the outputs directory named by the scope')
     parser.add_argument('-of', '--common_outputs_directory', required=False, help='directory where the outputs will be stored (outputs is default)')
     parser.add_argument('-od', '--common_outputs_dialogs', required=False, help='name of generated file (dialog.json is the default)')
+    parser.add_argument('-cm', '--common_outputs_compact', required=False, help='generate compact json (without indentation)', action='store_true')
+    parser.add_argument('-j', '--common_jobs', required=False, help='number of threads loading imported dialog files in parallel (number of CPUs is the default)')
+    parser.add_argument('-cd', '--common_cache_directory', required=False, help='directory with the compilation cache, dialog is not regenerated if none of its inputs changed')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
+    parser.add_argument('--profile', required=False, help='file where JSON report with wall time and memory of compilation phases is written')
+    parser.add_argument('--profile_stats', required=False, help='file where cProfile statistics of the compilation are dumped (see pstats)')
     args = parser.parse_args(argv)
-    global config
 
     if __name__ == '__main__':
         setLoggerConfig(args.log, args.verbose)
 
+    profiler = Profiler(enabled=bool(args.profile))
+    profile = None
+    if args.profile_stats:
+        profile = cProfile.Profile()
+        profile.enable()
+
     config = Cfg(args)
 
     logger.info('STARTING: ' + os.path.basename(__file__))
 
-    # XML namespaces
-    global XSI_NAMESPACE
-    global XSI
-    global NSMAP
-    XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
-    XSI = "{%s}" % XSI_NAMESPACE
-    NSMAP = {"xsi" : XSI_NAMESPACE}
-
-    # load dialogue from XML
-    dialogTreeFile = getOptionalParameter(config, 'common_dialog_main') or sys.stdin
-
-    if not os.path.exists(dialogTreeFile):
-        logger.critical('Root dialog file %s not found.', dialogTreeFile)
-        exit(1)
-
-    dialogTree = LET.parse(dialogTreeFile)
-
-    # load schema
-    schemaParam = getOptionalParameter(config, 'common_schema')
-    if schemaParam:
-        schemaDirname = os.path.split(os.path.abspath(__file__))[0]
-        schemaFile = os.path.join(schemaDirname, schemaParam)
-        if not os.path.exists(schemaFile):
-            logger.critical('Schema file %s not found.', schemaFile)
-            exit(1)
-        #TODO might need UTF-8
-        schemaTree = LET.parse(schemaFile)
-        global schema
-        schema = LET.XMLSchema(schemaTree)
-        validate(dialogTree, dialogTreeFile, False)
-
-    # process dialog tree
-    root = dialogTree.getroot()
-    global rootGlobal
-    rootGlobal = root
-    importNodes(root, config)
-
-    # remove all comments
-    removeAllComments(dialogTree)
-
-    # remove nodes which are out of specified scope
-    removeOutOfScopeNodes(dialogTree)
-
-    # find all node names
-    global names
-    names = findAllNodeNames(dialogTree)
-
-    global parent_map
-    parent_map = dict((c, p) for p in dialogTree.getiterator() for c in p)
-    generateNodes(root, None, DEFAULT_ABORT, DEFAULT_AGAIN, DEFAULT_BACK, DEFAULT_REPEAT, DEFAULT_GENERIC)
-
-    # create dialog structure for JSON
-    dialogNodes = []
-
-    # convert XML tree to JSON structure
-    printNodes(root, None, dialogNodes)
-
-    if hasattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_dialogs'):
-        if not os.path.exists(getattr(config, 'common_outputs_directory')):
-            os.makedirs(getattr(config, 'common_outputs_directory'))
-            logger.info("Created new output directory %s", getattr(config, 'common_outputs_directory'))
-        with io.open(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs')), 'w', encoding='utf-8') as outputFile:
-            outputFile.write(json.dumps(dialogNodes, indent=4, ensure_ascii=False))
-        logger.info("File %s created", os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs')))
+    compact = getattr(config, 'common_outputs_compact', False) in [True, 'true', 'True']
+
+    if getattr(config, 'common_scopes', None):
+        # one dialog per scope, each to its own subdirectory of the outputs directory
+        scopes = getattr(config, 'common_scopes')
+        if not isinstance(scopes, list):
+            scopes = scopes.split(',')
+        scopes = list(OrderedDict.fromkeys(scope.strip() for scope in scopes))
+        if hasattr(config, 'common_scope'):
+            logger.warning("Both 'common_scope' and 'common_scopes' parameters defined, 'common_scope' is ignored.")
+        outputsDirectory = getRequiredParameter(config, 'common_outputs_directory')
+        outputsDialogs = getattr(config, 'common_outputs_dialogs', 'dialog.json')
+        for scope, dialogNodes in DialogCompiler(config, profiler).iterScopesDialogNodes(scopes):
+            # dialog nodes are generated lazily, phases of the generation are measured separately
+            with profiler.phase('emit'):
+                writeDialogFile(dialogNodes, os.path.join(outputsDirectory, scope), outputsDialogs, compact)
+    elif hasattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_dialogs'):
+        dialogNodes = DialogCompiler(config, profiler).iterDialogNodes()
+        with profiler.phase('emit'):
+            writeDialogFile(dialogNodes, getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs'), compact)
     else:
-        print(json.dumps(dialogNodes, indent=4, ensure_ascii=False))
+        dialogNodes = DialogCompiler(config, profiler).iterDialogNodes()
+        with profiler.phase('emit'):
+            writeDialogNodes(dialogNodes, sys.stdout, compact)
+        print()
 
     if hasattr(config, 'common_output_config'):
         config.saveConfiguration(getattr(config, 'common_output_config'))
 
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(args.profile_stats)
+        logger.info("cProfile statistics written to %s", args.profile_stats)
+    if args.profile:
+        profiler.writeReport(args.profile)
+
     logger.info('FINISHING: ' + os.path.basename(__file__))
 
 if __name__ == '__main__':
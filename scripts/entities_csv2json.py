@@ -19,13 +19,111 @@ import json
 import logging
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 from cfgCommons import Cfg
-from wawCommons import (getFilesAtPath, getScriptLogger, openFile,
-                        setLoggerConfig, toEntityName)
+from wawCommons import (callWithLoggerConfig, getFilesAtPath, getLoggerConfig,
+                        getScriptLogger, openFile, setLoggerConfig,
+                        toEntityName)
 
 logger = getScriptLogger(__file__)
 
+def processEntityFile(entityFileName, nameCheck, namePolicy, fuzzyMatching):
+    """Returns list of entities (JSON objects) read from the entity csv file
+
+    File system_entities contains one system entity per line, any other file contains values of the entity named
+    by the file. It does not touch any shared data so that entity files can be processed in parallel processes.
+    """
+    entitiesJSON = []
+    with openFile(entityFileName, mode='r', encoding='utf8') as entityFile:
+
+        entityName = os.path.splitext(os.path.basename(entityFileName))[0]
+
+        # system entities
+        if entityName == "system_entities":
+            for line in entityFile:
+                # remove comments
+                line = line.split('#')[0]
+                line = line.rstrip().lower()
+                if line:
+                    # create new system entity
+                    entityJSON = {}
+                    entityJSON['entity'] = line
+                    entityJSON['values'] = []
+                    # Set fuzzy matching
+                    if fuzzyMatching:
+                        entityJSON['fuzzy_match'] = True
+                    entitiesJSON.append(entityJSON)
+
+        # other entities
+        else:
+            entityName = toEntityName(namePolicy, nameCheck, entityName)
+
+            # create new entity
+            entityJSON = {}
+            entityJSON['entity'] = entityName
+            valuesJSON = []
+            # add all values
+            for line in entityFile:
+                # remove comments
+                line = line.split('#')[0]
+                line = line.strip()
+                if line:
+                    # strip all items in line (they are not lowered, patterns are case sensitive)
+                    rawSynonyms = [synonym.strip() for synonym in line.split(';')]
+                    representativeValue = rawSynonyms[0]
+                    # remove value (and empty items) from synonyms, so that duplicity with value is not possible
+                    synonyms = sorted(set(rawSynonyms[1:]) - {representativeValue, ''})
+                    valueJSON = {}
+                    if representativeValue[0] in '~':
+                        # all patterns are represented by the first value without first char (~)
+                        valueJSON['type'] = 'patterns'
+                        valueJSON['value'] = representativeValue[1:]
+                        # add all patterns
+                        if len(synonyms) > 0:
+                            valueJSON['patterns'] = synonyms
+                    else:
+                        # all synonyms are represented by the first value
+                        valueJSON['value'] = representativeValue
+                        # add all synonyms
+                        if len(synonyms) > 0:
+                            valueJSON['synonyms'] = synonyms
+                    valuesJSON.append(valueJSON)
+            entityJSON['values'] = valuesJSON
+            # Set fuzzy matching
+            if fuzzyMatching:
+                entityJSON['fuzzy_match'] = True
+            entitiesJSON.append(entityJSON)
+    return entitiesJSON
+
+def mergeEntities(entitiesJSON, entityIndex, fileEntitiesJSON, entityFileName):
+    """Appends entities read from the entity file (by processEntityFile) to entitiesJSON
+
+    entityIndex is the index of entities already in entitiesJSON, key: (entity name, None) for the entity itself and
+    (entity name, value or synonym) for its values and synonyms, value: name of the file defining it.
+    Duplicated system entities are skipped (e.g., when composing more projects together), entities, values and
+    synonyms of other entities defined in several files are reported.
+    """
+    systemEntities = os.path.splitext(os.path.basename(entityFileName))[0] == "system_entities"
+    for entityJSON in fileEntitiesJSON:
+        entityName = entityJSON['entity']
+        if (entityName, None) not in entityIndex:
+            entityIndex[(entityName, None)] = entityFileName
+        elif systemEntities:
+            logger.info("Skipping duplicated '%s' system entity.", entityName)
+            continue
+        else:
+            logger.warning("Entity '%s' from file '%s' is already defined in file '%s'.", entityName, entityFileName, entityIndex[(entityName, None)])
+        if not systemEntities:
+            for valueJSON in entityJSON['values']:
+                for text in [valueJSON['value']] + valueJSON.get('synonyms', []):
+                    definingFileName = entityIndex.setdefault((entityName, text), entityFileName)
+                    if definingFileName != entityFileName:
+                        logger.warning("Value or synonym '%s' of entity '%s' from file '%s' is already defined in file '%s'.",
+                                       text, entityName, entityFileName, definingFileName)
+        entitiesJSON.append(entityJSON)
+
 def main(argv):
     parser = argparse.ArgumentParser(description='Conversion entity csv files to .json.', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -35,6 +133,7 @@ def main(argv):
     parser.add_argument('-od', '--common_outputs_directory', required=False, help='directory where the otputs will be stored (outputs is default)')
     parser.add_argument('-oe', '--common_outputs_entities', help='file with output json with all the entities')
     parser.add_argument('-ne', '--common_entities_nameCheck', action='append', nargs=2, help="regex and replacement for entity name check, e.g. '-' '_' for to replace hyphens for underscores or '$special' '\\L' for lowercase")
+    parser.add_argument('-j', '--common_jobs', required=False, help='number of processes processing entity files in parallel (1 is the default)')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('-s', '--common_soft', required=False, help='soft name policy - change intents and entities names without error.', action='store_true', default="")
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
@@ -56,9 +155,6 @@ def main(argv):
     if not hasattr(config, 'common_outputs_entities'):
         logger.info('Outputs_entities parameter is not defined, output will be generated to console.')
 
-    # process entities
-    entitiesJSON = []
-
     globalFuzzyMatching = False
     if hasattr(config, 'entities_fuzzy'):
         globalFuzzyMatching = getattr(config, 'entities_fuzzy') in ['true', 'True', 'on', 'On']
@@ -66,73 +162,24 @@ def main(argv):
     pathList = getattr(config, 'common_entities')
     if hasattr(config, 'common_generated_entities'):
         pathList = pathList + getattr(config, 'common_generated_entities')
-    filesAtPath = getFilesAtPath(pathList)
-    for entityFileName in sorted(filesAtPath):
-
-        with openFile(entityFileName, mode='r', encoding='utf8') as entityFile:
-
-            entityName = os.path.splitext(os.path.basename(entityFileName))[0]
-
-            # system entities
-            if entityName == "system_entities":
-                for line in entityFile.readlines():
-                    # remove comments
-                    line = line.split('#')[0]
-                    line = line.rstrip().lower()
-                    if line:
-                        # create new system entity
-                        entityJSON = {}
-                        entityJSON['entity'] = line
-                        entityJSON['values'] = []
-                        # Set fuzzy matching
-                        if globalFuzzyMatching:
-                            entityJSON['fuzzy_match'] = True
-                        if entityJSON not in entitiesJSON: #we do not want system entities duplicated, e.g., when composing more projects together
-                            entitiesJSON.append(entityJSON)
-                        else:
-                            logger.info("Skipping duplicated '%s' system entity.", line)
-
-            # other entities
-            else:
-                entityName = toEntityName(NAME_POLICY, getattr(config, 'common_entities_nameCheck') if hasattr(config, 'common_entities_nameCheck') else None, entityName)
-
-                # create new entity
-                entityJSON = {}
-                entityJSON['entity'] = entityName
-                valuesJSON = []
-                # add all values
-                for line in entityFile.readlines():
-                    # remove comments
-                    line = line.split('#')[0]
-                    line = line.strip()
-                    if line:
-                        rawSynonyms = line.split(';')
-                        # strip and lower all items in line
-                        [x.strip().lower() for x in rawSynonyms]
-                        representativeValue = rawSynonyms[0]
-                        synonyms = sorted(list(set(rawSynonyms[1:])))
-                        # remove value from synonyms, so that duplicity with value is not possible
-                        if representativeValue in synonyms: synonyms.remove(representativeValue)
-                        valueJSON = {}
-                        if representativeValue[0] in '~':
-                            # all patterns are represented by the first value without first char (~)
-                            valueJSON['type'] = 'patterns'
-                            valueJSON['value'] = representativeValue[1:]
-                            # add all patterns
-                            if len(synonyms) > 0:
-                                valueJSON['patterns'] = synonyms
-                        else:
-                            # all synonyms are represented by the first value
-                            valueJSON['value'] = representativeValue
-                            # add all synonyms
-                            if len(synonyms) > 0:
-                                valueJSON['synonyms'] = synonyms
-                        valuesJSON.append(valueJSON)
-                entityJSON['values'] = valuesJSON
-                # Set fuzzy matching
-                if globalFuzzyMatching:
-                    entityJSON['fuzzy_match'] = True
-                entitiesJSON.append(entityJSON)
+    filesAtPath = sorted(getFilesAtPath(pathList))
+    nameCheck = getattr(config, 'common_entities_nameCheck') if hasattr(config, 'common_entities_nameCheck') else None
+    jobs = int(getattr(config, 'common_jobs', 1) or 1)
+    if jobs > 1 and len(filesAtPath) > 1:
+        # entity files are processed in parallel processes, entities are merged in the order of files
+        # (workers started by spawn need the logging configured as well)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(filesAtPath))) as executor:
+            processEntities = partial(callWithLoggerConfig, getLoggerConfig(), processEntityFile)
+            filesEntitiesJSON = list(executor.map(processEntities, filesAtPath, [nameCheck] * len(filesAtPath),
+                                                  [NAME_POLICY] * len(filesAtPath), [globalFuzzyMatching] * len(filesAtPath)))
+    else:
+        filesEntitiesJSON = [processEntityFile(entityFileName, nameCheck, NAME_POLICY, globalFuzzyMatching) for entityFileName in filesAtPath]
+
+    # process entities
+    entitiesJSON = []
+    entityIndex = {}
+    for entityFileName, fileEntitiesJSON in zip(filesAtPath, filesEntitiesJSON):
+        mergeEntities(entitiesJSON, entityIndex, fileEntitiesJSON, entityFileName)
 
     if getattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_entities'):
         if not os.path.exists(getattr(config, 'common_outputs_directory')):
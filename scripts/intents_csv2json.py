@@ -21,41 +21,76 @@ import logging
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+from cacheCommons import getCacheDirectory, hashFile, hashString, readCacheEntry, writeCacheEntry
 from cfgCommons import Cfg
-from wawCommons import (getFilesAtPath, getScriptLogger, openFile,
-                        setLoggerConfig, toIntentName)
+from wawCommons import (callWithLoggerConfig, getFilesAtPath, getLoggerConfig,
+                        getScriptLogger, openFile, setLoggerConfig,
+                        toIntentName)
 
 logger = getScriptLogger(__file__)
 
-def processExample(line, intentName, examples):
-    example = {}
-    #find all matches of contextual entities
-    matches = re.findall(r'<(.*)>([^</>]*?)<\/\1>', line)
-
-    #strip the tags
-    lineRemovedInnerAnnotation = line
-    while True:
-        lineRemovedInnerAnnotation = re.sub(r'<(.*)>([^</>]*?)<\/\1>', r'\2', lineRemovedInnerAnnotation)
-        outerTagsMatches = re.findall(r'<(.*)>([^</>]*?)<\/\1>', lineRemovedInnerAnnotation)
-        if len(outerTagsMatches) > 0:
-            for match in outerTagsMatches:
-                logger.warning('For the intent %s, omitting outer tag annotation: <%s>', intentName, match[0])
+# opening or closing annotation tag, e.g. <color> or </color>
+ANNOTATION_TAG_PATTERN = re.compile(r'<(/?)([^<>]*)>')
+
+def parseAnnotations(line, intentName):
+    """Strips annotation tags from the line, returns the text and the list of mentions (entity, start, end)
+
+    Only the innermost annotations (without any tags inside) are mentions, outer annotations are omitted
+    with a warning. The line is scanned only once, open tags are kept on a stack.
+    """
+    textParts = []
+    textLength = 0
+    mentions = []
+    # open annotations: [tag, start of the text, position of the tag in the line, contains nested annotation]
+    stack = []
+    invalidTags = []
+    position = 0
+    for match in ANNOTATION_TAG_PATTERN.finditer(line):
+        textPart = line[position:match.start()]
+        textParts.append(textPart)
+        textLength += len(textPart)
+        position = match.end()
+        isClosing, tag = match.groups()
+        if not isClosing:
+            if stack:
+                stack[-1][3] = True
+            stack.append([tag, textLength, match.start(), False])
+        elif stack and stack[-1][0] == tag:
+            openTag, start, _, nested = stack.pop()
+            if nested:
+                logger.warning('For the intent %s, omitting outer tag annotation: <%s>', intentName, openTag)
+            else:
+                mentions.append((openTag, start, textLength))
         else:
-            break
-    invalidAnnotation = re.findall(r'<.*?>', lineRemovedInnerAnnotation)
-    if len(invalidAnnotation) > 0:
-        for match in invalidAnnotation:
-            logger.error('Invalid annotation tag for the intent %s, %s', intentName, match)
+            invalidTags.append((match.start(), match.group(0)))
+    textParts.append(line[position:])
+
+    invalidTags.extend((tagPosition, '<' + tag + '>') for tag, _, tagPosition, _ in stack)
+    if invalidTags:
+        for _, tag in sorted(invalidTags):
+            logger.error('Invalid annotation tag for the intent %s, %s', intentName, tag)
         exit(1)
+    return ''.join(textParts), mentions
+
+def processExample(line, intentName, examples, exampleTexts=None):
+    """Returns example (text and mentions of contextual entities) parsed from the annotated line
+
+    Returns None if the line is empty or the same example is already in examples. exampleTexts is a set
+    of texts of all the examples (it is used instead of going through examples if given).
+    """
+    example = {}
+    lineRemovedInnerAnnotation, mentions = parseAnnotations(line, intentName)
 
     #isn't it already in example?
-    alreadyin = False
-    for prevexample in examples:
-        if lineRemovedInnerAnnotation == str(prevexample['text']):
-            logger.warning('Example used twice for the intent %s, omitting: %s', intentName, lineRemovedInnerAnnotation)
-            alreadyin = True
+    if exampleTexts is not None:
+        alreadyin = lineRemovedInnerAnnotation in exampleTexts
+    else:
+        alreadyin = any(lineRemovedInnerAnnotation == prevexample['text'] for prevexample in examples)
     if alreadyin:
+        logger.warning('Example used twice for the intent %s, omitting: %s', intentName, lineRemovedInnerAnnotation)
         return None
     if not lineRemovedInnerAnnotation:
         logger.warning('Omitting empty line for intent %s after annotation tags are removed: %s', intentName, line)
@@ -63,16 +98,54 @@ def processExample(line, intentName, examples):
 
     # locating the match
     example['text'] = lineRemovedInnerAnnotation
-    if len(matches) > 0:
-        example['mentions'] = []
-        for match in matches:
-            start = lineRemovedInnerAnnotation.index(match[1])
-            end = start + len(match[1])
-            entity = match[0]
-            example['mentions'].append({'entity': entity, 'location':[start, end]})
+    if mentions:
+        example['mentions'] = [{'entity': entity, 'location': [start, end]} for entity, start, end in mentions]
     #return the example object
     return example
 
+def processIntentFile(intentFileName, nameCheck, namePolicy):
+    """Returns intent (name and examples) read from the intent csv file"""
+    intentName = toIntentName(namePolicy, nameCheck, os.path.splitext(os.path.basename(intentFileName))[0])
+    with openFile(intentFileName, 'r', encoding='utf8') as intentFile:
+        intent = {}
+        intent['intent'] = intentName
+        examples = []
+        exampleTexts = set()
+        for line in intentFile:
+            # remove comments
+            line = line.split('#')[0]
+            line = line.rstrip().lower()
+            #non-ascii characters fix
+            #line = line.encode('utf-8')
+            if line:
+                example = processExample(line, intentName, examples, exampleTexts)
+                #adding to the list
+                if example:
+                    examples.append(example)
+                    exampleTexts.add(example['text'])
+
+        intent['examples'] = examples
+    return intent
+
+def readIntentFile(intentFileName, nameCheck, namePolicy, cacheDirectory=None):
+    """Returns intent read from the intent csv file by processIntentFile
+
+    If cacheDirectory is given, intent of the file which was already processed (with the same content,
+    name check rules and name policy) is taken from the cache. It does not touch any shared data so that
+    intent files can be read in parallel processes.
+    """
+    if not cacheDirectory:
+        return processIntentFile(intentFileName, nameCheck, namePolicy)
+    cacheKey = hashString(os.path.basename(intentFileName), hashFile(intentFileName), json.dumps(nameCheck), namePolicy,
+                          hashFile(os.path.abspath(__file__)))
+    entry = readCacheEntry(cacheDirectory, cacheKey)
+    if entry is not None:
+        logger.verbose('Intent file %s not changed, reusing cached intent', intentFileName)
+        return entry['intent']
+    intent = processIntentFile(intentFileName, nameCheck, namePolicy)
+    writeCacheEntry(cacheDirectory, cacheKey, {'intent': intent})
+    return intent
+
 def main(argv):
     parser = argparse.ArgumentParser(description='Converts intent csv files to .json format of Watson Conversation Service', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
@@ -83,6 +156,8 @@ def main(argv):
     parser.add_argument('-oi', '--common_outputs_intents', help='file with output json with all the intents')
     parser.add_argument('-ni', '--common_intents_nameCheck', action='append', nargs=2, help="regex and replacement for intent name check, e.g. '-' '_' for to replace hyphens for underscores or '$special' '\\L' for lowercase")
     parser.add_argument('-s', '--soft', required=False, help='soft name policy - change intents and entities names without error.', action='store_true', default="")
+    parser.add_argument('-cd', '--common_cache_directory', required=False, help='directory with the cache of processed intent files, unchanged files are not processed again')
+    parser.add_argument('-j', '--common_jobs', required=False, help='number of processes processing intent files in parallel (1 is the default)')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
@@ -102,33 +177,22 @@ def main(argv):
     if not hasattr(config, 'common_outputs_intents'):
         logger.info('Outputs_intents parameter is not defined, output will be generated to console.')
 
-    intents = []
-
     pathList = getattr(config, 'common_intents')
     if hasattr(config, 'common_generated_intents'):
         pathList = pathList + getattr(config, 'common_generated_intents')
 
-    filesAtPath = getFilesAtPath(pathList)
-    for intentFileName in sorted(filesAtPath):
-        intentName = toIntentName(NAME_POLICY, args.common_intents_nameCheck, os.path.splitext(os.path.basename(intentFileName))[0])
-        with openFile(intentFileName, 'r', encoding='utf8') as intentFile:
-            intent = {}
-            intent['intent'] = intentName
-            examples = []
-            for line in intentFile:
-                # remove comments
-                line = line.split('#')[0]
-                line = line.rstrip().lower()
-                #non-ascii characters fix
-                #line = line.encode('utf-8')
-                if line:
-                    example = processExample(line, intentName, examples)
-                    #adding to the list
-                    if example:
-                        examples.append(example)
-
-            intent['examples'] = examples
-            intents.append(intent)
+    filesAtPath = sorted(getFilesAtPath(pathList))
+    cacheDirectory = getCacheDirectory(config, __file__)
+    jobs = int(getattr(config, 'common_jobs', 1) or 1)
+    if jobs > 1 and len(filesAtPath) > 1:
+        # intent files are processed in parallel processes, intents are merged in the order of files
+        # (workers started by spawn need the logging configured as well, readIntentFile logs verbose messages)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(filesAtPath))) as executor:
+            readIntent = partial(callWithLoggerConfig, getLoggerConfig(), readIntentFile)
+            intents = list(executor.map(readIntent, filesAtPath, [args.common_intents_nameCheck] * len(filesAtPath),
+                                        [NAME_POLICY] * len(filesAtPath), [cacheDirectory] * len(filesAtPath)))
+    else:
+        intents = [readIntentFile(intentFileName, args.common_intents_nameCheck, NAME_POLICY, cacheDirectory) for intentFileName in filesAtPath]
 
     if hasattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_intents'):
         if not os.path.exists(getattr(config, 'common_outputs_directory')):
@@ -0,0 +1,119 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import sys
+import threading
+import timeit
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+from wawCommons import getScriptLogger, openFile
+
+logger = getScriptLogger(__file__)
+
+
+def getCurrentMemory():
+    """Returns current resident memory of this process in bytes (None if it can not be measured on this platform)
+
+    It is read from /proc/self/statm, so it is measured on Linux only.
+    """
+    if resource is None:
+        return None
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+def getPeakMemory():
+    """Returns peak resident memory of this process in bytes (None if it can not be measured on this platform)"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+class Profiler(object):
+    """Measures wall time and memory of phases of a script
+
+    Memory of a phase is the change of the resident memory of the process (RSS) during the phase, so memory
+    allocated by native libraries (e.g. lxml trees) is included. It is negative if the phase released more memory
+    than it allocated, None where the current RSS can not be measured. Peak resident memory of the process
+    is reported after each phase as well (it only grows).
+
+    Phases are measured exclusively - when a phase starts inside another one (e.g. validation of an imported
+    file during import), time and memory change of the inner phase are not counted to the outer one. The same
+    phase can be entered several times, its time, memory change and number of calls are summed. Phases are
+    measured in the thread which created the profiler only, phases entered in other threads are ignored.
+
+    Disabled profiler measures nothing (and costs almost nothing).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.thread = threading.current_thread()
+        self.phases = OrderedDict()
+        # stack of running phases, time and resident memory when the top one was (re)started
+        self.stack = []
+        self.start = None
+        self.memory = None
+        self.created = timeit.default_timer()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled or threading.current_thread() is not self.thread:
+            yield
+            return
+        self.stopTopPhase()
+        self.stack.append(name)
+        phase = self.phases.setdefault(name, {'calls': 0, 'time': 0.0, 'memoryChange': None, 'peakMemory': None})
+        phase['calls'] += 1
+        try:
+            yield
+        finally:
+            self.stopTopPhase()
+            self.stack.pop()
+            phase['peakMemory'] = getPeakMemory()
+
+    def stopTopPhase(self):
+        """Adds time elapsed and memory change from the last (re)start to the running phase and restarts the measurement"""
+        now = timeit.default_timer()
+        memory = getCurrentMemory()
+        if self.stack:
+            phase = self.phases[self.stack[-1]]
+            phase['time'] += now - self.start
+            if memory is not None and self.memory is not None:
+                phase['memoryChange'] = (phase['memoryChange'] or 0) + memory - self.memory
+        self.start = now
+        self.memory = memory
+
+    def getReport(self):
+        """Returns report of all measured phases (time in seconds, memory in bytes)"""
+        return OrderedDict([
+            ('total', {'time': timeit.default_timer() - self.created, 'memory': getCurrentMemory(), 'peakMemory': getPeakMemory()}),
+            ('phases', self.phases),
+        ])
+
+    def writeReport(self, reportFile):
+        """Writes JSON report of all measured phases to the file"""
+        with openFile(reportFile, 'w') as report:
+            json.dump(self.getReport(), report, indent=4)
+        logger.info("Profile report written to %s", reportFile)
@@ -455,7 +455,12 @@ def getParametersCombination(config, *args):
 
     return parametersCombinationMap
 
+# arguments of the last setLoggerConfig call in this process (None if logging was not configured)
+_loggerConfig = None
+
 def setLoggerConfig(level=None, isVerbose=False, configPath=None):
+    global _loggerConfig
+    _loggerConfig = (level, isVerbose, configPath)
     d = os.path.dirname(os.path.abspath(__file__))
     fileConfig(configPath or d+'/logging_config.ini')
     l = logging.getLogger()
@@ -472,6 +477,26 @@ def setLoggerConfig(level=None, isVerbose=False, configPath=None):
         for h in l.handlers:
             h.setLevel(levelName)
 
+def getLoggerConfig():
+    """Returns arguments of setLoggerConfig which configured logging of this process (None if it was not configured)"""
+    return _loggerConfig
+
+def callWithLoggerConfig(loggerConfig, function, *args):
+    """Calls function(*args) with logging configured by setLoggerConfig(*loggerConfig), returns its result
+
+    Functions run in worker processes of ProcessPoolExecutor are called through it (loggerConfig is the result
+    of getLoggerConfig of the main process). Workers started by spawn (default on Windows and macOS) do not run
+    main of the script, so their logging (including logger.verbose) would not be configured otherwise.
+    Workers started by fork inherit the configuration, logging is configured only once in each process.
+    """
+    if loggerConfig is not None and loggerConfig != _loggerConfig:
+        setLoggerConfig(*loggerConfig)
+    return function(*args)
+
+def isVerbose(logger):
+    """Returns True if verbose messages of the logger are logged (so it is worth to prepare them)"""
+    return (getattr(logging.Logger, 'isVerbose', False) or logger.getEffectiveLevel() <= logging.DEBUG) and logger.isEnabledFor(logging.INFO)
+
 def getScriptLogger(script):
     return logging.getLogger("common."+os.path.splitext(os.path.basename(script))[0])
 